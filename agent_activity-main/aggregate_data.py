@@ -1,26 +1,51 @@
+import logging
+import time
+
 import pandas as pd
 
+from frame_io import read_frame, write_frame
+from workdays import valid_workday_mask
+from pipeline_logging import configure_logging, log_frame
+from profiling import record_rows, step
+
+logger = logging.getLogger(__name__)
+
 def load_data(data_path):
     """Load the data from the CSV file."""
-    return pd.read_csv(data_path)
+    # Only the columns the aggregation uses
+    return read_frame(data_path, columns=['Assignee name', 'Tickets solved', 'Ticket solved - Date', 'Complexity'])
+
+def summarize_daily(df):
+    """Partial aggregates per Assignee and day: tickets solved, ticket rows and complexity sum/count."""
+    # Tickets without a date still count towards the totals, so keep them as their own 'day'
+    df = df[df['Assignee name'].notna()]
+    return df.groupby(['Assignee name', 'Ticket solved - Date'], dropna=False, observed=True).agg(**{
+        'Tickets solved': ('Tickets solved', 'sum'),
+        'Ticket count': ('Tickets solved', 'size'),
+        'Complexity sum': ('Complexity', 'sum'),
+        'Complexity count': ('Complexity', 'count')
+    }).reset_index()
 
 def aggregate_data(df):
     """Aggregate the data to calculate required metrics per Assignee."""
+    with step('group'):
+        daily_df = summarize_daily(df)
+    with step('aggregate'):
+        return aggregate_daily(daily_df)
+
+def aggregate_daily(daily_df):
+    """Aggregate the per-day partials from summarize_daily into the metrics per Assignee."""
 
     # Calculate total tickets solved per Assignee (sum the tickets)
-    total_tickets_df = df.groupby('Assignee name', as_index=False).agg({
+    total_tickets_df = daily_df.groupby('Assignee name', as_index=False, observed=True).agg({
         'Tickets solved': 'sum'
     })
 
-    # Count unique days where more than 5 tickets were solved
-    def count_valid_days(group):
-        # For each Assignee, count days where more than 5 tickets were solved
-        daily_ticket_count = group.groupby('Ticket solved - Date')['Tickets solved'].sum()
-        valid_days = daily_ticket_count[daily_ticket_count > 5].count()  # Count only days with more than 3 tickets
-        return valid_days
-
-    # Apply the count_valid_days function to each Assignee
-    total_days_df = df.groupby('Assignee name').apply(count_valid_days).reset_index(name='Total Days Worked')
+    # Count unique days worked (more tickets solved than the valid-day threshold)
+    valid_days = daily_df[valid_workday_mask(daily_df)]
+    total_days_df = valid_days.groupby('Assignee name', observed=True).size().reindex(
+        total_tickets_df['Assignee name'], fill_value=0
+    ).reset_index(name='Total Days Worked')
 
     # Adjust 'Total Days Worked' for "Ryan Schlenz" by subtracting 2 hours a day from total days worked (30 days, 60 hours total, divide 60/8) subtract 7.5 days worked
     total_days_df.loc[total_days_df['Assignee name'] == 'Ryan Schlenz', 'Total Days Worked'] -= 7.5
@@ -29,15 +54,17 @@ def aggregate_data(df):
     merged_df = pd.merge(total_tickets_df, total_days_df, on='Assignee name')
 
     # Calculate daily solved ticket average:
-    # Tickets solved / Total days worked (where more than 3 tickets were solved)
+    # Tickets solved / Total days worked (days over the valid-day threshold)
     # Avoid division by zero in case someone has no valid workdays
     merged_df['Daily Solved Ticket Average'] = (merged_df['Tickets solved'] / merged_df['Total Days Worked'].replace(0, 1)).round(1)
 
     # Calculate mean complexity score per Assignee
-    complexity_df = df.groupby('Assignee name', as_index=False).agg({
-        'Complexity': 'mean'
+    complexity_df = daily_df.groupby('Assignee name', as_index=False, observed=True).agg({
+        'Complexity sum': 'sum',
+        'Complexity count': 'sum'
     })
-    complexity_df['Complexity'] = complexity_df['Complexity'].round(1)
+    complexity_df['Complexity'] = (complexity_df['Complexity sum'] / complexity_df['Complexity count']).round(1)
+    complexity_df = complexity_df[['Assignee name', 'Complexity']]
 
     # Merge the complexity score into the result
     merged_df = pd.merge(merged_df, complexity_df, on='Assignee name')
@@ -65,32 +92,35 @@ def classify_complexity(complexity_score):
 
 def save_results(df, output_file_path):
     """Save the aggregated data to a CSV file."""
-    df.to_csv(output_file_path, index=False)
-    print(f"Aggregated data saved to {output_file_path}")
+    output_file_path = write_frame(df, output_file_path)
+    logger.info("Aggregated data saved to %s", output_file_path)
 
 def main():
     # Define file paths
     data_path = 'complexity_data.csv'  # Input file with raw data
     output_file_path = 'aggregated_data.csv'  # Output file with aggregated results
 
+    start = time.perf_counter()
+
     # Load data
-    df = load_data(data_path)
+    with step('load'):
+        df = load_data(data_path)
 
-    # Display initial structure of the DataFrame
-    print("Initial DataFrame Info:")
-    print(df.info())
-    print(df.head())
+    # Display initial structure of the DataFrame, when debugging
+    log_frame(logger, "Initial DataFrame", df)
 
     # Process and aggregate data
     aggregated_df = aggregate_data(df)
 
-    # Display final structure of the DataFrame
-    print("\nAggregated DataFrame Info:")
-    print(aggregated_df.info())
-    print(aggregated_df.head())
+    # Display final structure of the DataFrame, when debugging
+    log_frame(logger, "Aggregated DataFrame", aggregated_df)
+    logger.info("Aggregated %d tickets into %d assignees in %.2fs", len(df), len(aggregated_df), time.perf_counter() - start)
 
     # Save final results
-    save_results(aggregated_df, output_file_path)
+    with step('write'):
+        save_results(aggregated_df, output_file_path)
+    record_rows(len(aggregated_df))
 
 if __name__ == "__main__":
+    configure_logging()
     main()
@@ -0,0 +1,83 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from project_config import config
+from frame_io import read_tickets
+from incremental import score_for_partials, partials, write_reports
+import profiling
+
+logger = logging.getLogger(__name__)
+
+# Batch mode: many reports (per period and/or team) from one combined export.
+#
+# Each entry of 'batch_reports' names a report and optionally limits it to a period
+# ('start'/'end' dates, inclusive) and to a team ('assignees'). The export is read and scored
+# once and reduced to the same per-Assignee/per-day partials incremental mode uses. A report
+# only needs the partials of its own days and assignees, so every report is a cheap filter of
+# them. The aggregate_data and calculate_time reports are exactly what a separate run on the
+# filtered export would produce. Each report is written to '<batch_output_dir>/<name>/',
+# with the reports written concurrently on a process pool.
+
+
+def report_partials(daily, spec):
+    """The partials of the days and assignees a report spec covers."""
+    keep = pd.Series(True, index=daily.index)
+
+    if spec.get('start') or spec.get('end'):
+        dates = pd.to_datetime(daily['Ticket solved - Date'], errors='coerce')
+        # Tickets without a valid date fall outside every period
+        keep &= dates.notna()
+        if spec.get('start'):
+            keep &= dates >= pd.Timestamp(spec['start'])
+        if spec.get('end'):
+            # Inclusive of the whole end day
+            keep &= dates < pd.Timestamp(spec['end']) + pd.Timedelta(days=1)
+
+    if spec.get('assignees') is not None:
+        keep &= daily['Assignee name'].isin(spec['assignees'])
+
+    return daily[keep].reset_index(drop=True)
+
+
+def write_batch_report(spec, daily, output_dir):
+    """Write one report's files to '<output_dir>/<name>/' and return them."""
+    report_dir = os.path.join(output_dir, spec['name'])
+    os.makedirs(report_dir, exist_ok=True)
+    return write_reports(daily, report_dir)
+
+
+def run_batch(input_file_path=None, specs=None, output_dir=None, max_workers=None):
+    """Write every report in 'batch_reports' from one pass over the export. Returns created files."""
+    input_file_path = input_file_path or config.get('input_file', 'ticket_data.csv')
+    specs = config.get('batch_reports', []) if specs is None else specs
+    output_dir = output_dir or config.get('batch_output_dir', 'reports')
+    max_workers = max_workers or config.get('max_workers') or os.cpu_count()
+
+    names = [spec['name'] for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError("Every batch report needs its own 'name' (it is the report's output directory).")
+
+    with profiling.stage('batch') as record:
+        with profiling.step('load'):
+            export_df = read_tickets(input_file_path)
+        record['rows'] = len(export_df)
+
+        # Score and reduce the whole export once for all reports
+        with profiling.step('score'):
+            scored = score_for_partials(export_df)
+        with profiling.step('group'):
+            daily = partials(scored)
+            report_days = [report_partials(daily, spec) for spec in specs]
+
+        with profiling.step('write'):
+            if max_workers > 1 and len(specs) > 1:
+                with ProcessPoolExecutor(max_workers=min(max_workers, len(specs))) as executor:
+                    results = list(executor.map(write_batch_report, specs, report_days, [output_dir] * len(specs)))
+            else:
+                results = [write_batch_report(spec, days, output_dir) for spec, days in zip(specs, report_days)]
+
+    logger.info("Wrote %d reports from %d tickets to %s", len(specs), len(export_df), output_dir)
+    return [path for files in results for path in files]
@@ -0,0 +1,516 @@
+import json
+import os
+import platform
+import runpy
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+from complexity_rules import score_complexity, categorize_complexity
+
+# Synthetic Zendesk-style exports (generate_tickets) used to time the pipeline without real
+# ticket data.
+
+# Weighted value pools for generate_tickets(), roughly shaped like a service desk export
+GROUP_WEIGHTS = {
+    'Service Desk': 0.58, 'Field Services': 0.1, 'UAP': 0.08, 'Onboarding': 0.08,
+    'Mobile Reconciliation': 0.05, 'Service Desk, UAP': 0.04, 'Service Desk, Field Services': 0.06, None: 0.01
+}
+# About a third of tickets are calls, voicemails and callbacks; '{}' gets a caller or number
+SUBJECT_WEIGHTS = {
+    'Voicemail from {}': 0.12, 'Call with caller {}': 0.08, 'Missed Call from {}': 0.05,
+    'Abandoned Call {}': 0.03, 'Conversation with {}': 0.04, 'Call back requested by {}': 0.02,
+    'Unknown caller {}': 0.01, 'Password reset for {}': 0.1, 'Account locked - {}': 0.06,
+    'New hire setup: {}': 0.05, 'Termination: {}': 0.03, 'Printer issue at {}': 0.06,
+    'Cannot login to HCHB - {}': 0.07, 'Outlook not syncing - {}': 0.05, 'Access request: {}': 0.08,
+    'Add {} to distribution list': 0.04, 'Phone not working - {}': 0.03, 'Software install for {}': 0.03,
+    '{}': 0.01
+}
+PRODUCT_WEIGHTS = {
+    'ADUC': 0.08, 'Exchange': 0.05, 'Fuze': 0.03, 'HCHB': 0.1, 'MOBI': 0.03, 'Printer/Scanner/Copier': 0.05,
+    'Teams': 0.04, 'Zendesk': 0.02, 'Windows': 0.05, 'Citrix': 0.03, 'Intune': 0.03, 'Network': 0.02,
+    'Outlook': 0.06, 'OneDrive': 0.03, 'Kronos': 0.04, 'Phone': 0.08, None: 0.26
+}
+ACTION_WEIGHTS = {
+    'Password Reset': 0.16, 'Unlocked Account': 0.07, 'Errant Fax': 0.01, 'Account Created': 0.04,
+    'No Action Taken': 0.07, 'Automation': 0.04, 'Meter Reading': 0.01, 'Terminated Employee Process': 0.03,
+    'Access Change': 0.08, 'Add/Remove from Distribution List': 0.03, 'Account Change': 0.04,
+    'Added License': 0.02, 'Account Locked': 0.02, 'Day 1 Concierge': 0.02, 'Troubleshooting': 0.14,
+    'Escalated': 0.06, 'Hardware Replaced': 0.04, None: 0.12
+}
+# Distinct callers / names a subject template is filled with
+SUBJECT_FILLERS = 3000
+
+
+def _weighted_choice(rng, weights, size):
+    values = np.array(list(weights), dtype=object)
+    p = np.array(list(weights.values()), dtype='float64')
+    return values[rng.choice(len(values), size, p=p / p.sum())]
+
+
+def generate_tickets(n_rows, n_agents=None, n_days=90, seed=0, first_ticket_id=1):
+    """
+    Synthetic Zendesk export with every column the pipeline needs and realistic cardinality:
+    recurring subjects with caller/name suffixes, weighted groups, products and actions, and
+    agents of different workloads so some agent-days fall under the valid-day threshold.
+    """
+    rng = np.random.default_rng(seed)
+    n_agents = n_agents or int(np.clip(n_rows // 1500, 10, 2000))
+    dates = pd.bdate_range('2024-01-01', periods=n_days).strftime('%Y-%m-%d').to_numpy()
+
+    # Subjects: a template filled from a pool of callers, the popular ones recurring most
+    templates = list(SUBJECT_WEIGHTS)
+    template = rng.choice(len(templates), n_rows, p=np.array(list(SUBJECT_WEIGHTS.values())) / sum(SUBJECT_WEIGHTS.values()))
+    prefixes = pd.Series(np.array([t.split('{}')[0] for t in templates], dtype=object)[template])
+    suffixes = pd.Series(np.array([t.split('{}')[1] for t in templates], dtype=object)[template])
+    fillers = np.array([f'{i:04d}' for i in range(SUBJECT_FILLERS)], dtype=object)
+    subjects = prefixes + fillers[rng.zipf(1.3, n_rows) % SUBJECT_FILLERS] + suffixes
+
+    workload = rng.gamma(2.0, 1.0, n_agents)
+    return pd.DataFrame({
+        'Ticket ID': first_ticket_id + rng.permutation(n_rows),
+        'Ticket group': _weighted_choice(rng, GROUP_WEIGHTS, n_rows),
+        'Ticket subject': subjects.to_numpy(dtype=object),
+        'Product - Service Desk Tool': _weighted_choice(rng, PRODUCT_WEIGHTS, n_rows),
+        'Assignee name': np.array([f'Agent {i:04d}' for i in range(n_agents)])[
+            rng.choice(n_agents, n_rows, p=workload / workload.sum())],
+        'Tickets solved': (rng.random(n_rows) > 0.03).astype(int),
+        'Action Taken to Resolve': _weighted_choice(rng, ACTION_WEIGHTS, n_rows),
+        'Ticket solved - Date': dates[rng.integers(0, n_days, n_rows)]
+    })
+
+
+def write_ticket_data(path, n_rows, seed=0, chunk_size=1_000_000):
+    """Write a generate_tickets() export to path, chunk by chunk so 10M rows fit in memory."""
+    n_agents = int(np.clip(n_rows // 1500, 10, 2000))
+    for i, start in enumerate(range(0, n_rows, chunk_size)):
+        chunk = generate_tickets(min(chunk_size, n_rows - start), n_agents=n_agents, seed=seed + i,
+                                 first_ticket_id=start + 1)
+        chunk.to_csv(path, index=False, mode='w' if i == 0 else 'a', header=i == 0)
+
+
+# The keyword and product lists of calculate_complexity.py before the scoring engine, verbatim
+# (missing commas included), so the engine's compiled and normalized rules are checked against
+# the original rather than against themselves
+LEGACY_KEYWORDS = [
+    'Voicemail',
+    'voicemail',
+    'voice mail',
+    'vm', 
+    'Call with caller', 
+    'Call With Caller', 
+    'Call With', 
+    'Call with Caller'
+    'Abandoned Call', 
+    'Abandoned call',
+    'Missed Call'
+    'call back',
+    'CallBack',
+    'callback',
+    'Call Back',
+    'Call back',
+    'Missed Call',
+    'Missed call',
+    'Conversation with',
+    'Unknown caller'
+]
+LEGACY_HIGH_COMPLEXITY_PRODUCTS = [
+    'ADUC',
+    'Exchange',
+    'Fuze',
+    'HCHB',
+    'MOBI',
+    'Printer/Scanner/Copier',
+    'Teams',
+    'Zendesk',
+    'Windows',
+    'Citrix',
+    'Intune', 
+    'Network'
+]
+
+
+def legacy_assign_complexity(df):
+    """The original row-by-row apply path of calculate_complexity.py: timing baseline and reference."""
+    keywords = LEGACY_KEYWORDS
+    high_complexity_products = LEGACY_HIGH_COMPLEXITY_PRODUCTS
+
+    def assign_complexity(ticket_group, ticket_subject, product, action_taken):
+        if pd.isna(ticket_group) or pd.isna(ticket_subject):
+            return None  # Return None if any required value is NaN
+        ticket_groups = [group.strip() for group in ticket_group.split(',')]
+
+        # Check for specific ticket groups
+        if 'UAP' in ticket_groups:
+            return 2.0
+        if 'Mobile Reconciliation' in ticket_groups:
+            return 5.0
+        elif any(keyword.lower() in ticket_subject.lower() for keyword in keywords):
+            return 0.0  # Complexity level for ticket subjects with specified keywords
+        elif pd.notna(action_taken) and any(action in action_taken for action in ['Password Reset', 'Errant Fax', 'Unlocked Account', 'Create']):
+            return 15.0  # Complexity level for password reset action and Errant Fax
+        elif pd.notna(action_taken) and any(action in action_taken for action in ['No Action Taken', 'Automation', 'Meter Reading']):
+            return 1.0  # Complexity for these actions
+        elif pd.notna(action_taken) and any(action in action_taken for action in ['Access Change', 'Add/Remove from Distribution List', 'Account Change', 'Updated DL Group', 'Added License', 'Add to Allowlist', 'Account Locked', 'HCHB', 'Contractor/Volunteer Set-Up', 'Day 1 Concierge']):
+            return 20.0  # Complexity for these actions
+        elif product in high_complexity_products:
+            return 75.0  # Complexity level for high complexity products
+        else:
+            return 25.0  # Default complexity level for other groups
+
+    return df.apply(lambda row: assign_complexity(
+        row['Ticket group'],
+        row['Ticket subject'],
+        row['Product - Service Desk Tool'],
+        row.get('Action Taken to Resolve')), axis=1)
+
+
+def bench_complexity(n_rows):
+    """Time the vectorized scoring engine against the old per-row apply."""
+    from calculate_complexity import COMPLEXITY_TIERS
+
+    df = generate_tickets(n_rows)
+
+    start = time.perf_counter()
+    legacy = legacy_assign_complexity(df)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    complexity, _ = score_complexity(df, COMPLEXITY_TIERS)
+    categorize_complexity(complexity)
+    vectorized_seconds = time.perf_counter() - start
+
+    if not np.allclose(legacy.astype('float64'), complexity, equal_nan=True):
+        raise AssertionError("Vectorized scores differ from the apply path")
+
+    print(f"{n_rows:>10,} rows | apply: {legacy_seconds:8.3f}s | vectorized: {vectorized_seconds:8.3f}s | "
+          f"speedup: {legacy_seconds / vectorized_seconds:6.1f}x")
+
+
+def bench_scaling(n_rows):
+    """Speedup curve of partitioned scoring with 1, 2, 4, ... workers up to the number of cores."""
+    from calculate_complexity import COMPLEXITY_TIERS
+    from project_config import config
+
+    # Partition every size, even those normally scored in one process, and evaluate every row
+    # so the curve measures the partitioned work rather than the memo
+    config['parallel_scoring_min_rows'] = 0
+    config['memoize_rule_combinations'] = False
+
+    df = generate_tickets(n_rows)
+    counts = [1]
+    while counts[-1] * 2 <= max(os.cpu_count(), 2):
+        counts.append(counts[-1] * 2)
+
+    baseline = None
+    for workers in counts:
+        start = time.perf_counter()
+        complexity, _ = score_complexity(df, COMPLEXITY_TIERS, workers=workers)
+        seconds = time.perf_counter() - start
+
+        if baseline is None:
+            baseline, reference = seconds, complexity
+        elif not reference.equals(complexity):
+            raise AssertionError(f"Scores with {workers} workers differ from a single process")
+
+        print(f"{n_rows:>10,} rows | {workers:>3} workers: {seconds:8.3f}s | speedup: {baseline / seconds:5.2f}x")
+
+
+def legacy_time_report(grouped_df):
+    """The original row-by-row report assembly of calculate_time.py, kept here only as a timing baseline."""
+    # Dates handed over in memory are datetimes; format them the way they read back from the CSV
+    if pd.api.types.is_datetime64_any_dtype(grouped_df['Date']):
+        grouped_df = grouped_df.assign(Date=grouped_df['Date'].astype(str))
+
+    # Convert Points to hours and round to the nearest tenth
+    grouped_df['Hours'] = (grouped_df['Points'] / 60).clip(upper=9).round(1)
+
+    # Sort by Agent and Date
+    grouped_df.sort_values(by=['Agent', 'Date'], inplace=True)
+
+    # Create a new DataFrame for the output
+    output_df = pd.DataFrame()
+
+    # Iterate through the grouped DataFrame and add blank rows as needed
+    current_agent = None
+    for _, row in grouped_df.iterrows():
+        if row['Agent'] != current_agent:
+            if current_agent is not None:  # If not the first agent, add total row
+                # Calculate total hours and unique date count for the previous agent
+                total_hours = grouped_df[grouped_df['Agent'] == current_agent]['Hours'].sum()
+                unique_dates_count = grouped_df[grouped_df['Agent'] == current_agent]['Date'].nunique()
+
+                # Calculate average hours per day
+                average_hours = (total_hours / unique_dates_count).round(1) if unique_dates_count > 0 else 0
+
+                # Create total row with average hours
+                total_row = pd.DataFrame({'Date': ['Average'], 'Agent': [current_agent], 'Hours': [average_hours]})
+                output_df = pd.concat([output_df, total_row], ignore_index=True)
+
+                # Add a blank row after the total row
+                output_df = pd.concat([output_df, pd.DataFrame({'Date': [None], 'Agent': [None], 'Hours': [None]})], ignore_index=True)
+
+            current_agent = row['Agent']  # Update current agent
+
+        # Append the current row to the output DataFrame
+        output_df = pd.concat([output_df, row.to_frame().T], ignore_index=True)
+
+    # Calculate total hours and average for the last agent
+    if current_agent is not None:
+        total_hours = grouped_df[grouped_df['Agent'] == current_agent]['Hours'].sum()
+        unique_dates_count = grouped_df[grouped_df['Agent'] == current_agent]['Date'].nunique()
+        average_hours = (total_hours / unique_dates_count).round(1) if unique_dates_count > 0 else 0
+        total_row = pd.DataFrame({'Date': ['Average'], 'Agent': [current_agent], 'Hours': [average_hours]})
+        output_df = pd.concat([output_df, total_row], ignore_index=True)
+
+        # Add a blank row after the total row for the last agent
+        output_df = pd.concat([output_df, pd.DataFrame({'Date': [None], 'Agent': [None], 'Hours': [None]})], ignore_index=True)
+
+    return output_df
+
+
+def make_daily_points(n_rows, n_days=60, seed=0):
+    """Points per 'Date' and 'Agent' as calculate_time.py groups them (n_rows agent-days)."""
+    rng = np.random.default_rng(seed)
+    n_agents = -(-n_rows // n_days)  # Round up so there are enough agent-days
+    dates = pd.date_range('2024-01-01', periods=n_days).strftime('%Y-%m-%d')
+    return pd.DataFrame({
+        'Date': np.tile(dates, n_agents)[:n_rows],
+        'Agent': np.repeat([f'Agent {i:04d}' for i in range(n_agents)], n_days)[:n_rows],
+        'Points': rng.choice([0.0, 1.0, 2.0, 5.0, 15.0, 20.0, 25.0, 75.0], (n_rows, 12)).sum(axis=1)
+    })
+
+
+def bench_time(n_rows):
+    """Time the vectorized calculate_time report against the old row-by-row concat loop."""
+    from calculate_time import build_time_report
+
+    grouped_df = make_daily_points(n_rows)
+
+    start = time.perf_counter()
+    legacy = legacy_time_report(grouped_df.copy()).to_csv(index=False)
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = build_time_report(grouped_df.copy()).to_csv(index=False)
+    vectorized_seconds = time.perf_counter() - start
+
+    if legacy != vectorized:
+        raise AssertionError("Vectorized calculate_time report differs from the loop")
+
+    print(f"{n_rows:>10,} agent-days | loop: {legacy_seconds:8.3f}s | vectorized: {vectorized_seconds:8.3f}s | "
+          f"speedup: {legacy_seconds / vectorized_seconds:6.1f}x")
+
+
+def peak_rss_of(function, *args):
+    """Run function(*args) in a fresh process and return (result, peak RSS in MB) of that process."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(_measure_rss, function, *args).result()
+
+
+def _measure_rss(function, *args):
+    result = function(*args)
+    # VmHWM is this process's own peak; ru_maxrss would include the parent's peak before the fork
+    with open('/proc/self/status') as f:
+        peak_kb = next(int(line.split()[1]) for line in f if line.startswith('VmHWM:'))
+    return result, peak_kb / 1024
+
+
+def _in_memory_reports(input_file_path):
+    from calculate_complexity import score_tickets
+    from individual_categories import build_individual_report
+    from aggregate_data import aggregate_data
+    from calculate_time import calculate_time
+
+    tickets = pd.read_csv(input_file_path)
+    aggregated_df = aggregate_data(score_tickets(tickets))
+    time_df = calculate_time(build_individual_report(tickets))
+    return aggregated_df.to_csv(index=False), time_df.to_csv(index=False)
+
+
+def _streaming_reports(input_file_path, chunk_size):
+    from aggregate_data import aggregate_daily
+    from incremental import time_report
+    from streaming import summarize_export
+
+    daily = summarize_export(input_file_path, chunk_size)
+    return aggregate_daily(daily).to_csv(index=False), time_report(daily).to_csv(index=False)
+
+
+def bench_memory(n_rows, chunk_size=50_000):
+    """Compare peak RSS of the in-memory path and the chunked streaming path on the same export."""
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file_path = os.path.join(tmp, 'ticket_data.csv')
+        generate_tickets(n_rows).to_csv(input_file_path, index=False)
+
+        in_memory, in_memory_mb = peak_rss_of(_in_memory_reports, input_file_path)
+        streamed, streaming_mb = peak_rss_of(_streaming_reports, input_file_path, chunk_size)
+
+    if in_memory != streamed:
+        raise AssertionError("Streaming reports differ from the in-memory path")
+
+    print(f"{n_rows:>10,} rows | in memory: {in_memory_mb:8.1f} MB | "
+          f"streaming ({chunk_size:,} row chunks): {streaming_mb:8.1f} MB")
+
+
+def _frame_mb(load, input_file_path):
+    return load(input_file_path).memory_usage(deep=True).sum() / 1e6
+
+
+def bench_loading(n_rows):
+    """Frame size and peak RSS of loading the export with read_tickets against a plain read_csv."""
+    from frame_io import read_tickets
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file_path = os.path.join(tmp, 'ticket_data.csv')
+        generate_tickets(n_rows).to_csv(input_file_path, index=False)
+
+        plain_frame_mb, plain_mb = peak_rss_of(_frame_mb, pd.read_csv, input_file_path)
+        typed_frame_mb, typed_mb = peak_rss_of(_frame_mb, read_tickets, input_file_path)
+
+    print(f"{n_rows:>10,} rows | read_csv: {plain_frame_mb:8.1f} MB frame, {plain_mb:8.1f} MB peak | "
+          f"read_tickets: {typed_frame_mb:8.1f} MB frame, {typed_mb:8.1f} MB peak | "
+          f"frame {plain_frame_mb / typed_frame_mb:4.1f}x smaller")
+
+
+def _legacy_excel_export(csv_file, xlsx_file):
+    start = time.perf_counter()
+    pd.read_csv(csv_file).to_excel(xlsx_file, index=False, engine='openpyxl')
+    return time.perf_counter() - start
+
+
+def _excel_export(csv_file, xlsx_file, engine):
+    from convert import write_workbook
+    from project_config import config
+
+    config['excel_engine'] = engine
+    # The pipeline hands the DataFrame over; reading it is not part of the export
+    df = pd.read_csv(csv_file)
+    start = time.perf_counter()
+    write_workbook(xlsx_file, {'Sheet1': df})
+    return time.perf_counter() - start
+
+
+def bench_excel(n_rows):
+    """Rows/sec and peak RSS of the Excel engines against the old read-CSV-then-openpyxl export."""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_file = os.path.join(tmp, 'tickets.csv')
+        generate_tickets(n_rows).to_csv(csv_file, index=False)
+        baseline_mb = peak_rss_of(pd.read_csv, csv_file)[1]
+
+        runs = [('csv + openpyxl', _legacy_excel_export, ())]
+        runs += [(engine, _excel_export, (engine,)) for engine in ['openpyxl', 'openpyxl_write_only', 'xlsxwriter']]
+        for label, export, args in runs:
+            xlsx_file = os.path.join(tmp, f'{label}.xlsx')
+            seconds, peak_mb = peak_rss_of(export, csv_file, xlsx_file, *args)
+            print(f"{n_rows:>10,} rows | {label:<20} {n_rows / seconds:>10,.0f} rows/s | "
+                  f"peak RSS: {peak_mb:8.1f} MB (data alone: {baseline_mb:.1f} MB)")
+
+
+def _run_script(workdir, script_path):
+    from project_config import config
+
+    # The scripts read and write their files relative to the working directory
+    os.chdir(workdir)
+    config['log_level'] = 'WARNING'
+    start = time.perf_counter()
+    runpy.run_path(script_path, run_name='__main__')
+    return time.perf_counter() - start
+
+
+def _run_in_process_pipeline(workdir):
+    from project_config import config
+    from pipeline import run_pipeline
+
+    os.chdir(workdir)
+    config.update(log_level='WARNING', cache_enabled=False)
+    start = time.perf_counter()
+    run_pipeline()
+    return time.perf_counter() - start
+
+
+def _stage_result(n_rows, seconds, peak_mb):
+    return {'seconds': round(seconds, 4), 'peak_rss_mb': round(peak_mb, 1), 'rows_per_second': round(n_rows / seconds)}
+
+
+def bench_pipeline(n_rows):
+    """Wall time, peak RSS and rows/sec of every script, and of the whole in-process pipeline, on a generated export."""
+    from project_config import config
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    stages = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        write_ticket_data(os.path.join(workdir, config.get('input_file', 'ticket_data.csv')), n_rows)
+
+        # Each script in a fresh process, in pipeline order, reading the previous scripts' files
+        for script in config['scripts']:
+            seconds, peak_mb = peak_rss_of(_run_script, workdir, os.path.join(here, script))
+            stages[script] = _stage_result(n_rows, seconds, peak_mb)
+
+        seconds, peak_mb = peak_rss_of(_run_in_process_pipeline, workdir)
+        stages['pipeline (in process)'] = _stage_result(n_rows, seconds, peak_mb)
+
+    for stage, result in stages.items():
+        print(f"{n_rows:>10,} rows | {stage:<28} {result['seconds']:9.3f}s | {result['rows_per_second']:>11,} rows/s | "
+              f"peak RSS: {result['peak_rss_mb']:8.1f} MB")
+    return {'rows': n_rows, 'stages': stages}
+
+
+def run_metadata():
+    """What a set of results was measured on, so runs of different versions can be compared."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'cpu_count': os.cpu_count()
+    }
+
+
+BENCHMARKS = {
+    'complexity': bench_complexity,
+    'excel': bench_excel,
+    'loading': bench_loading,
+    'memory': bench_memory,
+    'pipeline': bench_pipeline,
+    'scaling': bench_scaling,
+    'time': bench_time
+}
+
+
+def main():
+    # Usage: python benchmark.py [benchmark name] [row counts...]
+    #        python benchmark.py generate [row count]  (writes a synthetic ticket_data.csv)
+    name = sys.argv[1] if len(sys.argv) > 1 else 'complexity'
+    sizes = [int(n) for n in sys.argv[2:]] or [10_000, 100_000]
+
+    if name == 'generate':
+        from project_config import config
+        write_ticket_data(config.get('input_file', 'ticket_data.csv'), sizes[0])
+        return
+
+    results = [result for result in (BENCHMARKS[name](n_rows) for n_rows in sizes) if result]
+
+    # Benchmarks that return their measurements (pipeline) are saved for comparing versions
+    if results:
+        output_file = f'benchmark_{name}.json'
+        with open(output_file, 'w') as f:
+            json.dump(dict(run_metadata(), results=results), f, indent=2)
+        print(f"Results saved to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
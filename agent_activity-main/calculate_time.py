@@ -1,58 +1,94 @@
+import logging
+import time
+
+import numpy as np
 import pandas as pd
 
-# Load the CSV file
-file_path = 'individual_complexity_data.csv'  # Change this to your input file path
-df = pd.read_csv(file_path)
-
-# Group by 'Date' and 'Agent', then sum the 'Points'
-grouped_df = df.groupby(['Date', 'Agent'])['Points'].sum().reset_index()
-
-# Convert Points to hours and round to the nearest tenth
-grouped_df['Hours'] = (grouped_df['Points'] / 60).clip(upper=9).round(1)
-
-# Sort by Agent and Date
-grouped_df.sort_values(by=['Agent', 'Date'], inplace=True)
-
-# Create a new DataFrame for the output
-output_df = pd.DataFrame()
-
-# Iterate through the grouped DataFrame and add blank rows as needed
-current_agent = None
-for _, row in grouped_df.iterrows():
-    if row['Agent'] != current_agent:
-        if current_agent is not None:  # If not the first agent, add total row
-            # Calculate total hours and unique date count for the previous agent
-            total_hours = grouped_df[grouped_df['Agent'] == current_agent]['Hours'].sum()
-            unique_dates_count = grouped_df[grouped_df['Agent'] == current_agent]['Date'].nunique()
-            
-            # Calculate average hours per day
-            average_hours = (total_hours / unique_dates_count).round(1) if unique_dates_count > 0 else 0
-            
-            # Create total row with average hours
-            total_row = pd.DataFrame({'Date': ['Average'], 'Agent': [current_agent], 'Hours': [average_hours]})
-            output_df = pd.concat([output_df, total_row], ignore_index=True)
-
-            # Add a blank row after the total row
-            output_df = pd.concat([output_df, pd.DataFrame({'Date': [''], 'Agent': [''], 'Hours': ['']})], ignore_index=True)
-
-        current_agent = row['Agent']  # Update current agent
-    
-    # Append the current row to the output DataFrame
-    output_df = pd.concat([output_df, row.to_frame().T], ignore_index=True)
-
-# Calculate total hours and average for the last agent
-if current_agent is not None:
-    total_hours = grouped_df[grouped_df['Agent'] == current_agent]['Hours'].sum()
-    unique_dates_count = grouped_df[grouped_df['Agent'] == current_agent]['Date'].nunique()
-    average_hours = (total_hours / unique_dates_count).round(1) if unique_dates_count > 0 else 0
-    total_row = pd.DataFrame({'Date': ['Average'], 'Agent': [current_agent], 'Hours': [average_hours]})
-    output_df = pd.concat([output_df, total_row], ignore_index=True)
-
-    # Add a blank row after the total row for the last agent
-    output_df = pd.concat([output_df, pd.DataFrame({'Date': [''], 'Agent': [''], 'Hours': ['']})], ignore_index=True)
-
-# Save the result to a new CSV file
-output_file_path = 'calculate_time.csv'  # Change this to your output file path
-output_df.to_csv(output_file_path, index=False)
-
-print("Total hours per day for each agent have been calculated and saved to", output_file_path)
+from frame_io import read_frame, write_frame
+from pipeline_logging import configure_logging
+from profiling import record_rows, step
+
+logger = logging.getLogger(__name__)
+
+def calculate_time(df):
+    """Turn the individual report into hours per agent per day, with an average row after each agent."""
+    # Group by 'Date' and 'Agent', then sum the 'Points'
+    with step('group'):
+        grouped_df = df.groupby(['Date', 'Agent'], observed=True)['Points'].sum().reset_index()
+
+    with step('layout'):
+        return build_time_report(grouped_df)
+
+def build_time_report(grouped_df):
+    """Build the report from the points per 'Date' and 'Agent'."""
+    # Dates handed over in memory are datetimes; format them the way they read back from the CSV
+    if pd.api.types.is_datetime64_any_dtype(grouped_df['Date']):
+        grouped_df = grouped_df.assign(Date=grouped_df['Date'].astype(str))
+
+    # Convert Points to hours and round to the nearest tenth
+    grouped_df['Hours'] = (grouped_df['Points'] / 60).clip(upper=9).round(1)
+
+    # Sort by Agent and Date
+    grouped_df.sort_values(by=['Agent', 'Date'], inplace=True)
+
+    if grouped_df.empty:
+        return pd.DataFrame()
+
+    # Where each agent's block of days starts and ends in the sorted frame
+    agents = grouped_df['Agent'].to_numpy(dtype=object)
+    starts = np.flatnonzero(np.r_[True, agents[1:] != agents[:-1]])
+    ends = np.r_[starts[1:], len(agents)]
+
+    # Average hours per day for each agent (every row is a distinct date of that agent)
+    hours = grouped_df['Hours'].to_numpy(dtype='float64')
+    # Summed per slice with numpy's pairwise sum, like the report always has; groupby().sum() and
+    # np.add.reduceat add in a different order and can flip an average across a rounding boundary
+    total_hours = np.array([hours[start:end].sum() for start, end in zip(starts, ends)])
+    average_hours = (total_hours / (ends - starts)).round(1)
+
+    # Each agent's days are followed by an 'Average' row and a blank row: row i of agent k moves
+    # down by 2 * k, the agent's 'Average' row goes right after its last day, then the blank row
+    agent_number = np.repeat(np.arange(len(starts)), ends - starts)
+    day_rows = np.arange(len(agents)) + 2 * agent_number
+    average_rows = ends + 2 * np.arange(len(starts))
+    size = len(agents) + 2 * len(starts)
+
+    date = np.full(size, None, dtype=object)
+    date[day_rows] = grouped_df['Date'].to_numpy(dtype=object)
+    date[average_rows] = 'Average'
+
+    agent = np.full(size, None, dtype=object)
+    agent[day_rows] = agents
+    agent[average_rows] = agents[starts]
+
+    points = np.full(size, np.nan)
+    points[day_rows] = grouped_df['Points'].to_numpy(dtype='float64')
+
+    report_hours = np.full(size, np.nan)
+    report_hours[day_rows] = hours
+    report_hours[average_rows] = average_hours
+
+    return pd.DataFrame({'Date': date, 'Agent': agent, 'Points': points, 'Hours': report_hours})
+
+def main():
+    start = time.perf_counter()
+
+    # Load the CSV file
+    file_path = 'individual_complexity_data.csv'  # Change this to your input file path
+    with step('load'):
+        df = read_frame(file_path, columns=['Date', 'Agent', 'Points'])
+
+    output_df = calculate_time(df)
+
+    # Save the result to a new CSV file
+    output_file_path = 'calculate_time.csv'  # Change this to your output file path
+    with step('write'):
+        output_file_path = write_frame(output_df, output_file_path)
+    record_rows(len(output_df))
+
+    logger.info("Total hours per day for each agent have been calculated (%d rows in %.2fs) and saved to %s",
+                len(output_df), time.perf_counter() - start, output_file_path)
+
+if __name__ == "__main__":
+    configure_logging()
+    main()
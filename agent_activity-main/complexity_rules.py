@@ -0,0 +1,325 @@
+import functools
+import itertools
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from project_config import config
+
+# Complexity scoring engine shared by calculate_complexity.py and individual_categories.py.
+#
+# The rules live in project_config ('complexity_rules') and are compiled once per process by
+# load_rules(); both scoring stages share the compiled tiers they have in common, and keyword
+# tiers with the same keywords share one subject memo. A rule set is an ordered list of tiers.
+# Each tier looks at one column of the ticket data and assigns a score when it matches; the
+# first matching tier wins, exactly like the if/elif chain the scripts used to evaluate row by
+# row. Supported match types:
+#   'group'   - the column is a comma separated list of groups and one of them equals a value
+#   'keyword' - case-insensitive substring match (the column and the values are lowercased)
+#   'contains' - case-sensitive substring match
+#   'exact'   - the column equals one of the values
+#
+# Instead of calling a Python function for every ticket, every tier is compiled into a
+# single regular expression (or a set lookup) and evaluated as a whole-column boolean mask.
+# np.select then resolves the tier precedence in one pass.
+#
+# Keyword lists are normalized once: lowercased, deduplicated, and stripped of keywords that
+# contain another keyword (they can never change the outcome). Subjects recur a lot
+# ("Voicemail from ..."), so keyword tiers match each distinct subject only once and remember
+# the result, also across calls (e.g. the chunks of a streamed export).
+#
+# With 'memoize_rule_combinations' on, the columns of the other tiers are factorized first and
+# those tiers are evaluated once per distinct (group, product, action) combination; their
+# masks are broadcast back to the rows through the integer codes. Keyword tiers are left out
+# of the combination: subjects are close to unique per caller, and they have their own
+# per-subject memo. cache_stats() reports how many evaluations this saved.
+#
+# Large exports can be scored on several cores ('scoring_workers'). The rows are split into
+# contiguous ranges, one per worker. The rule columns are written once to an Arrow IPC file
+# that every worker memory-maps, and each worker writes the tier that decided each of its rows
+# into a shared memory array, so no ticket data is pickled between the processes. The
+# parent then resolves scores and categories from that array exactly as in a single process.
+
+
+def compile_tiers(tiers):
+    """Precompile the regex / lookup for every tier so it is built only once."""
+    compiled = []
+    for tier in tiers:
+        match = tier['match']
+        values = list(dict.fromkeys(tier['values']))  # Drop duplicates, keep order
+        if match == 'group':
+            pattern = r'(?:^|,)\s*(?:' + '|'.join(re.escape(v) for v in values) + r')\s*(?:,|$)'
+        elif match == 'keyword':
+            values = normalize_keywords(values)
+            pattern = '|'.join(re.escape(v) for v in values)
+        elif match == 'contains':
+            pattern = '|'.join(re.escape(v) for v in values)
+        elif match == 'exact':
+            pattern = None
+            values = frozenset(values)
+        else:
+            raise ValueError(f"Unknown match type for complexity tier: {match}")
+
+        compiled.append(dict(tier, values=values, pattern=re.compile(pattern) if pattern else None))
+    return compiled
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled_tiers():
+    rules = config['complexity_rules']
+    return {tier['name']: compiled for tier, compiled in zip(rules['tiers'], compile_tiers(rules['tiers']))}
+
+
+@functools.lru_cache(maxsize=None)
+def load_rules(report):
+    """Compiled tiers of one scoring stage ('calculate_complexity' or 'individual_categories')."""
+    rules = config['complexity_rules']
+    overrides = rules['reports'][report]
+    excluded = set(overrides.get('exclude', []))
+    extra_values = overrides.get('extra_values', {})
+
+    tiers = []
+    for tier in rules['tiers']:
+        if tier['name'] in excluded:
+            continue
+        if tier['name'] in extra_values:
+            # A tier with more values is compiled for this report alone
+            tiers += compile_tiers([dict(tier, values=extra_values[tier['name']] + list(tier['values']))])
+        else:
+            tiers.append(_compiled_tiers()[tier['name']])
+    return tiers
+
+
+# Distinct subjects remembered per keyword tier before the memo is started over
+KEYWORD_CACHE_SIZE = 100_000
+
+# Subject -> matched, per keyword pattern. Kept out of the tier dicts, so the tiers handed to
+# pool workers stay small
+_keyword_memos = {}
+
+# Counters behind cache_stats()
+_stats = {'rows': 0, 'combinations': 0, 'subject_lookups': 0, 'subject_hits': 0}
+
+
+def cache_stats():
+    """How often scoring reused an earlier result, since the start or the last reset_cache_stats()."""
+    stats = dict(_stats)
+    stats['combination_hit_rate'] = 1 - stats['combinations'] / stats['rows'] if stats['rows'] else 0.0
+    stats['subject_hit_rate'] = stats['subject_hits'] / stats['subject_lookups'] if stats['subject_lookups'] else 0.0
+    return stats
+
+
+def reset_cache_stats():
+    for name in _stats:
+        _stats[name] = 0
+
+
+def normalize_keywords(keywords):
+    """Lowercase and deduplicate keywords, dropping those that contain another keyword."""
+    keywords = list(dict.fromkeys(k.strip().lower() for k in keywords if k.strip()))
+    return [k for k in keywords if not any(other != k and other in k for other in keywords)]
+
+
+def keyword_mask(column, tier):
+    """Case-insensitive keyword match, evaluated once per distinct value of the column."""
+    codes, subjects = pd.factorize(column)
+    memo = _keyword_memos.setdefault(tier['pattern'].pattern, {})
+
+    new = [subject for subject in subjects if subject not in memo]
+    _stats['subject_lookups'] += len(subjects)
+    _stats['subject_hits'] += len(subjects) - len(new)
+    if len(memo) + len(new) > KEYWORD_CACHE_SIZE:
+        memo.clear()
+        new = list(subjects)
+    # Non-text values never match, as before
+    search = tier['pattern'].search
+    found = {subject: isinstance(subject, str) and search(subject.lower()) is not None for subject in new}
+    # Only as many as fit are remembered, however many distinct subjects this call has
+    memo.update(itertools.islice(found.items(), max(KEYWORD_CACHE_SIZE - len(memo), 0)))
+
+    # Missing values (code -1) pick the trailing False
+    hits = np.fromiter((found[subject] if subject in found else memo[subject] for subject in subjects),
+                       dtype=bool, count=len(subjects))
+    return pd.Series(np.append(hits, False)[codes], index=column.index)
+
+
+def tier_mask(df, tier):
+    """Return a boolean Series marking the rows matched by a compiled tier."""
+    column = df[tier['column']]
+
+    if tier['match'] == 'exact':
+        return column.isin(tier['values'])
+    if tier['match'] == 'keyword':
+        return keyword_mask(column, tier)
+
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Match each category once; missing values (code -1) pick the trailing False
+        categories = column.cat.categories.to_series().astype(object)
+        hits = categories.str.contains(tier['pattern'], na=False).astype(bool).to_numpy()
+        return pd.Series(np.append(hits, False)[column.cat.codes.to_numpy()], index=column.index)
+
+    # Columns that pandas did not read as text (e.g. all empty) have no .str accessor
+    text = column if pd.api.types.is_string_dtype(column) else column.astype(object)
+    return text.str.contains(tier['pattern'], na=False).astype(bool)
+
+
+def decide_tiers(df, tiers):
+    """
+    Return, for every row, the index of the tier that decides its score: len(tiers) when no
+    tier matches (default score) and -1 when the ticket has no group or subject (not scored).
+    """
+    memoized = [tier['match'] != 'keyword' for tier in tiers]
+    codes = None
+    rules_df = df
+    if config.get('memoize_rule_combinations', True) and any(memoized):
+        # Evaluate the other tiers on one row per distinct combination of their columns
+        columns = list(dict.fromkeys(tier['column'] for tier, memo in zip(tiers, memoized) if memo))
+        codes, first_rows = factorize_rows(df[columns])
+        rules_df = df.iloc[first_rows]
+    _stats['rows'] += len(df)
+    _stats['combinations'] += len(rules_df)
+
+    masks = []
+    for tier, memo in zip(tiers, memoized):
+        if memo and codes is not None:
+            masks.append(tier_mask(rules_df, tier).to_numpy()[codes])
+        else:
+            masks.append(tier_mask(df, tier).to_numpy())
+    unscored = (df['Ticket group'].isna() | df['Ticket subject'].isna()).to_numpy()
+    return np.select([unscored] + masks, [-1] + list(range(len(tiers))), default=len(tiers)).astype(np.int8)
+
+
+def rule_columns(tiers):
+    """The columns a rule set looks at, including the two that decide whether a ticket is scored."""
+    return list(dict.fromkeys(['Ticket group', 'Ticket subject'] + [tier['column'] for tier in tiers]))
+
+
+def factorize_rows(df):
+    """Integer code of every row's combination of values, and the first row of each combination."""
+    codes = np.zeros(len(df), dtype=np.int64)
+    for column in df.columns:
+        # Missing values get code 0 of their column; combined codes stay unique per combination
+        column_codes, uniques = pd.factorize(df[column])
+        codes = codes * (len(uniques) + 1) + (column_codes + 1)
+        codes, _ = pd.factorize(codes)
+    # Codes are numbered in order of appearance, so a combination's first row is where the running maximum grows
+    first_rows = np.flatnonzero(np.diff(np.maximum.accumulate(codes), prepend=-1) > 0)
+    return codes, first_rows
+
+
+def resolve_tiers(df, tiers, decided, default_score=25.0, default_column='Ticket subject'):
+    """Turn the deciding tier of every row into the (complexity, category) pair of Series."""
+    # decided + 1 indexes [not scored, tier 0, ..., tier n-1, default]
+    complexity = np.array([np.nan] + [tier['score'] for tier in tiers] + [default_score])[decided + 1]
+
+    # The category is the value of the deciding column; each column is read only for its own rows
+    category = np.full(len(df), None, dtype=object)
+    columns = [tier['column'] for tier in tiers] + [default_column]
+    for column in dict.fromkeys(columns):
+        rows = np.flatnonzero(np.isin(decided, [i for i, c in enumerate(columns) if c == column]))
+        category[rows] = df[column].iloc[rows].to_numpy(dtype=object)
+
+    return (
+        pd.Series(complexity, index=df.index, dtype='float64'),
+        pd.Series(category, index=df.index, dtype=object)
+    )
+
+
+def score_complexity(df, tiers, default_score=None, default_column='Ticket subject', workers=None):
+    """
+    Score every ticket in one vectorized pass.
+
+    Returns a (complexity, category) pair of Series aligned with df. 'category' is the
+    value of the column that decided the score (the 'Category' column of the individual
+    report). Tickets no tier matches score default_score (default: the one in
+    project_config); tickets with no group or subject are not scored (NaN / None).
+
+    Unless 'memoize_rule_combinations' is off, the non-keyword tiers are evaluated once per
+    distinct combination of their columns. With more than one worker (default: the
+    'scoring_workers' setting), exports of at least 'parallel_scoring_min_rows' rows are
+    scored on a process pool.
+    """
+    compiled = tiers if all('pattern' in tier for tier in tiers) else compile_tiers(tiers)
+
+    workers = scoring_workers() if workers is None else workers
+    if workers > 1 and len(df) >= config.get('parallel_scoring_min_rows', 100_000):
+        decided = decide_tiers_parallel(df, compiled, workers)
+    else:
+        decided = decide_tiers(df, compiled)
+
+    if default_score is None:
+        default_score = config['complexity_rules'].get('default_score', 25.0)
+    return resolve_tiers(df, compiled, decided, default_score, default_column)
+
+
+def scoring_workers():
+    return config.get('scoring_workers', 1) or os.cpu_count()
+
+
+def decide_tiers_parallel(df, tiers, workers):
+    """decide_tiers on a process pool: one contiguous row range per worker."""
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    # Only the columns the rules look at are shared with the workers
+    columns = rule_columns(tiers)
+    bounds = np.linspace(0, len(df), workers + 1).astype(int)
+
+    decided = shared_memory.SharedMemory(create=True, size=max(len(df), 1))
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            arrow_path = os.path.join(tmp, 'tickets.arrow')
+            table = pa.Table.from_pandas(df[columns].astype(object), preserve_index=False)
+            with ipc.new_file(arrow_path, table.schema) as writer:
+                writer.write_table(table)
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_decide_partition, arrow_path, decided.name, tiers, start, stop)
+                    for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start
+                ]
+                # Count the workers' memo hits as if they had scored in this process
+                for future in futures:
+                    for name, count in future.result().items():
+                        _stats[name] += count
+
+        # Each worker filled its own range, so the array is in row order
+        return np.ndarray(len(df), dtype=np.int8, buffer=decided.buf).copy()
+    finally:
+        decided.close()
+        decided.unlink()
+
+
+def _decide_partition(arrow_path, shm_name, tiers, start, stop):
+    """decide_tiers on one row range; returns what it added to this worker's cache counters."""
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    # Memory-mapped, so a worker only reads the pages of its own rows
+    with pa.memory_map(arrow_path) as source:
+        partition = ipc.open_file(source).read_all().slice(start, stop - start).to_pandas()
+
+    before = dict(_stats)
+    decided = shared_memory.SharedMemory(name=shm_name)
+    try:
+        np.ndarray(stop - start, dtype=np.int8, buffer=decided.buf, offset=start)[:] = decide_tiers(partition, tiers)
+    finally:
+        decided.close()
+    return {name: count - before[name] for name, count in _stats.items()}
+
+
+# Complexity categories in order; the category column holds their int8 codes
+COMPLEXITY_CATEGORIES = ['Low', 'Medium', 'High']
+
+
+def categorize_complexity(points):
+    """Vectorized Low / Medium / High bucketing of complexity points, as a categorical."""
+    points = np.asarray(points, dtype='float64')
+    # Unscored (NaN) tickets fall through to 'High', as they always have
+    codes = np.select([points < 15, points <= 25], [0, 1], default=2).astype(np.int8)
+    return pd.Categorical.from_codes(codes, categories=COMPLEXITY_CATEGORIES, ordered=True)
@@ -1,20 +1,126 @@
+import logging
 import pandas as pd
 import os
 
+from project_config import config
+from frame_io import intermediate_format, read_frame
+from pipeline_logging import configure_logging
+from profiling import record_rows, step
+
+logger = logging.getLogger(__name__)
+
 # List of CSV files to convert
 csv_files = ['aggregated_data.csv', 'calculate_time.csv']  # Replace with your CSV file paths
 
-# Loop through each CSV file and convert it to a separate Excel file
-for csv_file in csv_files:
-    # Extract the base name (without extension) for naming the output file
-    base_name = os.path.splitext(os.path.basename(csv_file))[0]
-    xlsx_file = f'{base_name}.xlsx'  # Define the output Excel file path in the current directory
+# Header cells get the same look pandas gives them
+HEADER_STYLE = {'bold': True, 'border': 'thin', 'align': 'center', 'valign': 'top'}
+
+def excel_engine():
+    return config.get('excel_engine', 'openpyxl_write_only')
+
+# Rows converted to Python values at a time, so the whole sheet is never copied at once
+SHEET_ROW_BLOCK = 10_000
+
+def sheet_rows(df):
+    """The DataFrame's rows as tuples of plain Python values, with None for missing values."""
+    for start in range(0, len(df), SHEET_ROW_BLOCK):
+        block = df.iloc[start:start + SHEET_ROW_BLOCK]
+        yield from block.astype(object).where(block.notna(), None).itertuples(index=False, name=None)
+
+def write_openpyxl_write_only(path, sheets):
+    """Write {sheet name: DataFrame} with openpyxl in write-only mode, streaming one row at a time."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Border, Font, Side
+
+    workbook = Workbook(write_only=True)
+    side = Side(style=HEADER_STYLE['border'])
+    for sheet_name, df in sheets.items():
+        worksheet = workbook.create_sheet(sheet_name)
+        header = []
+        for column in df.columns:
+            cell = WriteOnlyCell(worksheet, value=str(column))
+            cell.font = Font(bold=HEADER_STYLE['bold'])
+            cell.border = Border(left=side, right=side, top=side, bottom=side)
+            cell.alignment = Alignment(horizontal=HEADER_STYLE['align'], vertical=HEADER_STYLE['valign'])
+            header.append(cell)
+        worksheet.append(header)
+        for row in sheet_rows(df):
+            worksheet.append(row)
+    workbook.save(path)
+
+def write_xlsxwriter(path, sheets):
+    """Write {sheet name: DataFrame} with xlsxwriter in constant_memory mode (rows are flushed as written)."""
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'nan_inf_to_errors': True})
+    header_format = workbook.add_format({
+        'bold': HEADER_STYLE['bold'], 'border': 1, 'align': HEADER_STYLE['align'], 'valign': HEADER_STYLE['valign']
+    })
+    for sheet_name, df in sheets.items():
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, [str(column) for column in df.columns], header_format)
+        for row_number, row in enumerate(sheet_rows(df), start=1):
+            worksheet.write_row(row_number, 0, row)
+    workbook.close()
+
+def write_workbook(path, sheets):
+    """Write {sheet name: DataFrame} to one workbook with the configured 'excel_engine'."""
+    engine = excel_engine()
+    if engine == 'xlsxwriter':
+        write_xlsxwriter(path, sheets)
+    elif engine == 'openpyxl_write_only':
+        write_openpyxl_write_only(path, sheets)
+    elif engine == 'openpyxl':
+        with pd.ExcelWriter(path, engine='openpyxl') as writer:
+            for sheet_name, df in sheets.items():
+                df.to_excel(writer, sheet_name=sheet_name, index=False)
+    else:
+        raise ValueError(f"Unknown excel_engine: {engine}")
+
+def convert_frames(frames, output_dir=None):
+    """Write the DataFrames (keyed by base name) to Excel, in output_dir if given, and return the file paths."""
+    # All reports in one workbook, one sheet each, written in a single pass
+    workbook = config.get('excel_workbook')
+    if workbook:
+        workbook = os.path.join(output_dir or '', workbook)
+        with step('write'):
+            write_workbook(workbook, frames)
+        return [workbook]
+
+    xlsx_files = []
+    for base_name, df in frames.items():
+        xlsx_file = os.path.join(output_dir or '', f'{base_name}.xlsx')  # Define the output Excel file path (current directory by default)
+
+        # Write the DataFrame to a separate Excel file
+        with step('write'):
+            write_workbook(xlsx_file, {'Sheet1': df})
+        xlsx_files.append(xlsx_file)
+
+    return xlsx_files
+
+def convert_csv_files(csv_files):
+    """Convert the CSV files to Excel, each to its own file or all to the configured workbook."""
+    frames = {}
+    for csv_file in csv_files:
+        # Extract the base name (without extension) for naming the output file or sheet
+        base_name = os.path.splitext(os.path.basename(csv_file))[0]
+
+        # Read the CSV file (or its columnar handoff file) into a DataFrame
+        with step('load'):
+            frames[base_name] = read_frame(csv_file)
+
+        # Handoff files in a columnar format are exported to CSV only here, at the end
+        if intermediate_format() != 'csv':
+            with step('write'):
+                frames[base_name].to_csv(csv_file, index=False)
 
-    # Read the CSV file into a DataFrame
-    df = pd.read_csv(csv_file)
+    xlsx_files = convert_frames(frames)
+    record_rows(sum(len(df) for df in frames.values()))
 
-    # Write the DataFrame to a separate Excel file
-    df.to_excel(xlsx_file, index=False, engine='openpyxl')
+    # Confirmation message
+    logger.info("CSV files %s have been successfully converted to %s", csv_files, xlsx_files)
 
-    # Confirmation message for each conversion
-    print(f"CSV file '{csv_file}' has been successfully converted to '{xlsx_file}'")
\ No newline at end of file
+if __name__ == "__main__":
+    configure_logging()
+    convert_csv_files(csv_files)
\ No newline at end of file
@@ -0,0 +1,176 @@
+import logging
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from project_config import config
+
+logger = logging.getLogger(__name__)
+
+# Reading and writing of the files stages hand to each other.
+#
+# With 'intermediate_format' set to 'parquet' or 'feather' the handoff files
+# (complexity_data.csv, individual_complexity_data.csv, aggregated_data.csv, calculate_time.csv)
+# are written in that columnar format instead, under the same name with the matching extension.
+# Low-cardinality text columns are stored as categoricals, scores as float32 and dates as real
+# datetimes, and readers load only the columns they use. convert.py then exports the final
+# reports to CSV and Excel. With the default 'csv' format nothing changes.
+#
+# The raw export is loaded by read_tickets with an explicit schema (TICKET_COLUMNS): only the
+# columns the stages use, low-cardinality text as categoricals and 'Ticket solved - Date'
+# parsed while reading. It logs how much memory that saves over a plain read_csv.
+
+CATEGORICAL_COLUMNS = [
+    'Assignee name', 'Agent', 'Assignee Name', 'Ticket group', 'Product - Service Desk Tool',
+    'Action Taken to Resolve', 'Category', 'Complexity Category', 'Mean Complexity Category'
+]
+# Scores are whole numbers, so float32 holds them exactly
+NARROW_FLOAT_COLUMNS = ['Complexity', 'Points']
+DATE_COLUMNS = ['Ticket solved - Date', 'Date']
+
+# The columns of the raw export the stages use, with their dtypes (None: as read_csv infers it)
+TICKET_COLUMNS = {
+    'Ticket ID': None,
+    'Ticket group': 'category',
+    'Ticket subject': None,  # Mostly distinct, so a categorical would not be smaller
+    'Product - Service Desk Tool': 'category',
+    'Assignee name': 'category',
+    'Tickets solved': None,
+    'Action Taken to Resolve': 'category',
+    'Ticket solved - Date': None  # Parsed after reading, see parse_dates
+}
+
+EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather'}
+
+
+def intermediate_format():
+    return config.get('intermediate_format', 'csv')
+
+
+def intermediate_path(path):
+    """The file actually used for a handoff file named in project_config (e.g. complexity_data.csv)."""
+    base, ext = os.path.splitext(path)
+    if ext != '.csv' or path == config.get('input_file', 'ticket_data.csv'):
+        return path
+    return base + EXTENSIONS[intermediate_format()]
+
+
+def output_paths(script_name):
+    """Files a script writes, with handoff files under the configured format."""
+    paths = [intermediate_path(f) for f in config.get('output_files', {}).get(script_name, [])]
+    # In a columnar format the final CSV reports are exported by convert.py along with the Excel files
+    if script_name == 'convert.py' and intermediate_format() != 'csv':
+        paths += config.get('input_files', {}).get(script_name, [])
+    # ... and with 'excel_workbook' set they all go into that one workbook
+    if script_name == 'convert.py' and config.get('excel_workbook'):
+        paths = [p for p in paths if not p.endswith('.xlsx')] + [config['excel_workbook']]
+    return paths
+
+
+def parse_dates(df):
+    """Parse the date columns of df in place, each only when every one of its dates parses."""
+    for column in DATE_COLUMNS:
+        if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            # Otherwise the column stays text, so nothing is lost compared to the CSV
+            parsed = pd.to_datetime(df[column], errors='coerce')
+            if parsed.notna().sum() == df[column].notna().sum():
+                df[column] = parsed
+    return df
+
+
+def optimize_dtypes(df):
+    """Compact dtypes for a columnar handoff file."""
+    df = parse_dates(df.infer_objects())
+    for column in df.columns:
+        values = df[column]
+        if column in DATE_COLUMNS and pd.api.types.is_datetime64_any_dtype(values):
+            continue
+        if column in CATEGORICAL_COLUMNS:
+            df[column] = values.astype('category')
+        elif column in NARROW_FLOAT_COLUMNS and pd.api.types.is_float_dtype(values):
+            df[column] = values.astype('float32')
+        elif values.dtype == object:
+            # Mixed columns (e.g. 'Ticket #' with ids and 'Total') are stored as text
+            df[column] = values.astype(str).where(values.notna())
+    return df
+
+
+def write_frame(df, path):
+    """Write a handoff file in the configured format and return the path written."""
+    path = intermediate_path(path)
+    if path.endswith('.parquet'):
+        optimize_dtypes(df).to_parquet(path, index=False)
+    elif path.endswith('.feather'):
+        optimize_dtypes(df).reset_index(drop=True).to_feather(path)
+    else:
+        df.to_csv(path, index=False)
+    return path
+
+
+def read_frame(path, columns=None):
+    """Read a handoff file written by write_frame, optionally only some of its columns."""
+    path = intermediate_path(path)
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path, columns=columns)
+    elif path.endswith('.feather'):
+        df = pd.read_feather(path, columns=columns)
+    else:
+        dtypes = {c: 'category' for c in CATEGORICAL_COLUMNS if columns is None or c in columns}
+        return parse_dates(pd.read_csv(path, usecols=columns, dtype=dtypes))
+
+    # Scores are stored narrow but computed on in full precision, as they are from CSV
+    narrow = [c for c in df.columns if df[c].dtype == 'float32']
+    return df.astype({c: 'float64' for c in narrow})
+
+
+# Whether read_csv holds text as Python str objects (pandas < 3) or as Arrow strings
+_TEXT_AS_OBJECTS = pd.Series(['text']).dtype == object
+
+
+def plain_bytes(values):
+    """About how many bytes a categorical or date column would take as read_csv's plain text."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        texts = values.cat.categories.astype(str)
+        counts = np.bincount(values.cat.codes[values.cat.codes >= 0], minlength=len(texts))
+    elif pd.api.types.is_datetime64_any_dtype(values):
+        texts, counts = ['YYYY-MM-DD'], [values.notna().sum()]
+    else:
+        return values.memory_usage(deep=True, index=False)
+
+    if _TEXT_AS_OBJECTS:
+        # An 8-byte pointer per row and one str object per row
+        sizes = [sys.getsizeof(text) for text in texts]
+    else:
+        # The UTF-8 bytes and an 8-byte offset per row
+        sizes = [len(text.encode()) for text in texts]
+    return len(values) * 8 + int(np.dot(counts, sizes))
+
+
+def read_tickets(path, chunksize=None, dates=True):
+    """
+    Load the raw ticket export with the TICKET_COLUMNS schema.
+
+    Only the columns the stages use are read, low-cardinality text is read as categoricals
+    and, with dates set, 'Ticket solved - Date' is parsed when every date in it parses. With
+    chunksize an iterator of chunks is returned; their dates stay text, as one chunk could
+    parse where another does not.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    columns = [c for c in TICKET_COLUMNS if c in header]
+    dtypes = {c: TICKET_COLUMNS[c] for c in columns if TICKET_COLUMNS[c]}
+
+    if chunksize:
+        return pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunksize)
+
+    df = pd.read_csv(path, usecols=columns, dtype=dtypes)
+    if dates:
+        parse_dates(df)
+
+    if logger.isEnabledFor(logging.INFO):
+        typed = df.memory_usage(deep=True, index=False)
+        plain = sum(plain_bytes(df[column]) for column in df.columns)
+        logger.info("Loaded %d tickets from %s: %.1f MB in memory, %.1f MB (%.1fx) less than the same columns as plain text",
+                    len(df), path, typed.sum() / 1e6, (plain - typed.sum()) / 1e6, plain / max(typed.sum(), 1))
+    return df
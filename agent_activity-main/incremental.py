@@ -0,0 +1,194 @@
+import hashlib
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from project_config import config
+import calculate_complexity
+import individual_categories
+from complexity_rules import score_complexity
+from aggregate_data import aggregate_daily
+from calculate_time import build_time_report
+from convert import convert_frames
+from stage_cache import file_digest
+from frame_io import read_tickets
+from workdays import valid_workday_mask
+import profiling
+
+logger = logging.getLogger(__name__)
+
+# Incremental mode: only tickets that are new or changed since the last run are scored.
+#
+# The store keeps one row per 'Ticket ID' (its scores and a hash of the fields they depend
+# on) and the per-Assignee/per-day partial aggregates built from them (tickets solved,
+# ticket rows, complexity sum/count, individual report points). A run scores the delta,
+# takes the old contribution of changed/removed tickets out of the partials and adds the new
+# one, then builds the aggregate_data and calculate_time reports from the partials alone.
+
+# Fields that decide a ticket's scores and where it is counted
+TICKET_FIELDS = [
+    'Ticket group', 'Ticket subject', 'Product - Service Desk Tool', 'Action Taken to Resolve',
+    'Assignee name', 'Tickets solved', 'Ticket solved - Date'
+]
+DAY_KEY = ['Assignee name', 'Ticket solved - Date']
+PARTIAL_COLUMNS = ['Tickets solved', 'Ticket count', 'Complexity sum', 'Complexity count', 'Points']
+
+# The stored scores are only valid for the rules they were computed with
+RULE_FILES = ['complexity_rules.py', 'calculate_complexity.py', 'individual_categories.py']
+
+
+def store_path(name):
+    return os.path.join(config.get('incremental_store', 'incremental_store'), name)
+
+
+def rules_fingerprint():
+    # Only the scoring rules of project_config, so other settings can change without a rebuild
+    rules = repr(config['complexity_rules'])
+    return hashlib.sha256((''.join(file_digest(f) for f in RULE_FILES) + rules).encode()).hexdigest()
+
+
+def load_store():
+    """Return (tickets, daily) from the store, or empty frames if it is missing or the rules changed."""
+    try:
+        with open(store_path('rules.sha256')) as f:
+            fingerprint = f.read()
+        tickets = pd.read_pickle(store_path('tickets.pkl'))
+        daily = pd.read_pickle(store_path('daily.pkl'))
+    except FileNotFoundError:
+        fingerprint = None
+
+    if fingerprint != rules_fingerprint():
+        logger.info("Incremental store is empty or was built with other rules; rebuilding from scratch")
+        tickets = pd.DataFrame(columns=['Row hash'] + DAY_KEY + ['Tickets solved', 'Complexity', 'Points'])
+        tickets.index.name = 'Ticket ID'
+        daily = pd.DataFrame(columns=DAY_KEY + PARTIAL_COLUMNS)
+    return tickets, daily
+
+
+def save_store(tickets, daily):
+    os.makedirs(store_path(''), exist_ok=True)
+    tickets.to_pickle(store_path('tickets.pkl'))
+    daily.to_pickle(store_path('daily.pkl'))
+    with open(store_path('rules.sha256'), 'w') as f:
+        f.write(rules_fingerprint())
+
+
+def score_for_partials(df):
+    """Score a batch of tickets with both rule sets and keep only what the partials need."""
+    complexity, _ = score_complexity(df, calculate_complexity.COMPLEXITY_TIERS)
+    points, _ = score_complexity(df, individual_categories.COMPLEXITY_TIERS)
+    return pd.DataFrame({
+        'Assignee name': df['Assignee name'],
+        'Ticket solved - Date': df['Ticket solved - Date'],
+        'Tickets solved': df['Tickets solved'],
+        'Complexity': complexity,
+        'Points': points
+    }, index=df.index)
+
+
+def partials(tickets, sign=1):
+    """Per-Assignee/per-day partial aggregates of a set of scored tickets (negated with sign=-1)."""
+    tickets = tickets[tickets['Assignee name'].notna()]
+    daily = tickets.groupby(DAY_KEY, dropna=False, observed=True).agg(**{
+        'Tickets solved': ('Tickets solved', 'sum'),
+        'Ticket count': ('Tickets solved', 'size'),
+        'Complexity sum': ('Complexity', 'sum'),
+        'Complexity count': ('Complexity', 'count'),
+        'Points': ('Points', 'sum')
+    }).reset_index()
+    daily[PARTIAL_COLUMNS] *= sign
+    return daily
+
+
+def merge_partials(parts):
+    """Add up partial aggregates per Assignee and day, dropping days left without tickets."""
+    daily = pd.concat([part for part in parts if not part.empty], ignore_index=True)
+    daily = daily.groupby(DAY_KEY, dropna=False, observed=True)[PARTIAL_COLUMNS].sum().reset_index()
+    return daily[daily['Ticket count'] > 0].reset_index(drop=True)
+
+
+def update_store(export_df, full_export=True):
+    """Merge an export into the store and return the updated (tickets, daily) frames."""
+    if export_df['Ticket ID'].duplicated().any():
+        raise ValueError("Incremental mode needs a unique 'Ticket ID' per row.")
+
+    tickets, daily = load_store()
+
+    export_df = export_df.set_index('Ticket ID')
+    export_df['Row hash'] = pd.util.hash_pandas_object(export_df[TICKET_FIELDS], index=False)
+
+    # New tickets, tickets whose fields changed, and (for full exports) tickets that disappeared
+    known = export_df.index.isin(tickets.index)
+    unchanged = np.zeros(len(export_df), dtype=bool)
+    unchanged[known] = (
+        tickets['Row hash'].reindex(export_df.index[known]).to_numpy(dtype='uint64')
+        == export_df['Row hash'].to_numpy()[known]
+    )
+    changed = export_df[~unchanged]
+    outdated = tickets.index.intersection(changed.index)
+    if full_export:
+        outdated = outdated.union(tickets.index.difference(export_df.index))
+
+    logger.info("Incremental run: %d new or changed tickets, %d reused, %d replaced or removed",
+                len(changed), len(export_df) - len(changed), len(outdated))
+    if changed.empty and outdated.empty:
+        return tickets, daily
+
+    with profiling.step('score'):
+        scored = score_for_partials(changed).assign(**{'Row hash': changed['Row hash']})
+
+    # Swap the old contribution of outdated tickets for the new one
+    with profiling.step('group'):
+        daily = merge_partials([daily, partials(tickets.loc[outdated], sign=-1), partials(scored)])
+
+    tickets = tickets.drop(outdated)
+    tickets = pd.concat([tickets, scored]) if not tickets.empty else scored
+    with profiling.step('write'):
+        save_store(tickets, daily)
+    return tickets, daily
+
+
+def time_report(daily):
+    """The calculate_time report built from the partials (same rules as individual_categories.py)."""
+    # individual_categories.py works on parsed dates and drops tickets without a valid one
+    daily = daily.assign(**{'Ticket solved - Date': pd.to_datetime(daily['Ticket solved - Date'], errors='coerce')})
+    by_day = daily.groupby(['Ticket solved - Date', 'Assignee name'], observed=True)[['Tickets solved', 'Points']].sum().reset_index()
+
+    # Only days worked are in the individual report
+    by_day = by_day[valid_workday_mask(by_day)]
+    grouped_df = by_day.rename(columns={'Ticket solved - Date': 'Date', 'Assignee name': 'Agent'})
+    return build_time_report(grouped_df[['Date', 'Agent', 'Points']].reset_index(drop=True))
+
+
+def run_incremental(input_file_path=None, full_export=None):
+    """Update the store from the export and write the aggregate and time reports. Returns created files."""
+    input_file_path = input_file_path or config.get('input_file', 'ticket_data.csv')
+    full_export = config.get('incremental_full_export', True) if full_export is None else full_export
+
+    with profiling.stage('incremental') as record:
+        with profiling.step('load'):
+            # Dates stay as exported: they key the stored partials, which must match from run to run
+            export_df = read_tickets(input_file_path, dates=False)
+        record['rows'] = len(export_df)
+
+        tickets, daily = update_store(export_df, full_export=full_export)
+        return write_reports(daily)
+
+
+def write_reports(daily, output_dir=None):
+    """Write the aggregate and time reports built from the partials as CSV and Excel (in output_dir, if given). Returns the files."""
+    with profiling.step('aggregate'):
+        aggregated_df = aggregate_daily(daily)
+        time_df = time_report(daily)
+
+    created_files = []
+    for csv_file, df in [('aggregated_data.csv', aggregated_df), ('calculate_time.csv', time_df)]:
+        csv_file = os.path.join(output_dir or '', csv_file)
+        with profiling.step('write'):
+            df.to_csv(csv_file, index=False)
+        created_files.append(csv_file)
+    created_files.extend(convert_frames({'aggregated_data': aggregated_df, 'calculate_time': time_df}, output_dir))
+
+    return created_files
@@ -1,12 +1,23 @@
+import logging
+import time
+
 import pandas as pd
 
-def add_complexity_column(input_file_path, output_file_path):
-    # Load your cleaned ticket data
-    df = pd.read_csv(input_file_path)
+from project_config import config
+from complexity_rules import load_rules, score_complexity, categorize_complexity
+from frame_io import read_tickets, write_frame
+from workdays import valid_workday_mask
+from pipeline_logging import audit_enabled, configure_logging, log_frame, write_audit
+from profiling import record_rows, step
+
+logger = logging.getLogger(__name__)
 
-    # Print the column names to debug
-    print("Columns in the input file:", df.columns.tolist())
+# Complexity tiers from project_config ('complexity_rules'). This report leaves out the 'UAP'
+# group tier, and anything no tier matches is categorized by its ticket subject.
+COMPLEXITY_TIERS = load_rules('individual_categories')
 
+def build_individual_report(df):
+    """Score the tickets on busy days and lay them out per agent with a total and a blank row after each."""
     # Check if the required columns exist
     required_columns = [
         'Ticket group', 
@@ -20,153 +31,85 @@ def add_complexity_column(input_file_path, output_file_path):
     if not all(col in df.columns for col in required_columns):
         raise ValueError("The required columns are not found in the data.")
 
-    # Print the structure of the DataFrame
-    print(df.info())
-    print(df.head())
-
-    # Ensure 'Ticket solved - Date' is a datetime type
-    df['Ticket solved - Date'] = pd.to_datetime(df['Ticket solved - Date'], errors='coerce')
-
-    # Filter out rows where the 'Ticket solved - Date' is NaT (invalid dates)
-    df = df[df['Ticket solved - Date'].notna()]
-
-    # List of keywords to check in the Ticket subject
-    keywords = [
-        'Voicemail',
-        'voicemail',
-        'voice mail',
-        'vm', 
-        'Call with caller', 
-        'Call With Caller', 
-        'Call With', 
-        'Call with Caller',
-        'Abandoned Call', 
-        'Abandoned call',
-        'Missed Call',
-        'call back',
-        'CallBack',
-        'callback',
-        'Call Back',
-        'Call back',
-        'Missed call',  
-        'Conversation with',
-        'Unknown caller'
-    ]
+    with step('validate'):
+        # Ensure 'Ticket solved - Date' is a datetime type (read_tickets leaves unparseable dates as text)
+        df = df.assign(**{'Ticket solved - Date': pd.to_datetime(df['Ticket solved - Date'], errors='coerce')})
 
-    # Count unique days where more than 5 tickets were solved
-    def count_valid_days(group):
-        # For each Assignee, count days where more than 5 tickets were solved
-        daily_ticket_count = group.groupby('Ticket solved - Date')['Tickets solved'].sum()
-        valid_days = daily_ticket_count[daily_ticket_count > 5].count()  # Count only days with more than 5 tickets
-        return valid_days
-
-    # Filter the DataFrame to include only dates where total tickets solved are greater than 5
-    df_filtered = df.groupby(['Ticket solved - Date', 'Assignee name']).filter(
-        lambda x: x['Tickets solved'].sum() > 5
-    )
-
-    # List of products that should multiply the complexity by 10 (high complexity)
-    high_complexity_products = [
-        'ADUC', 'Exchange', 'Fuze', 'HCHB', 'MOBI',
-        'Printer/Scanner/Copier', 'Teams', 'Zendesk',
-        'Windows', 'Citrix', 'Intune', 'Network'
-    ]
+        # Filter out rows where the 'Ticket solved - Date' is NaT (invalid dates)
+        df = df[df['Ticket solved - Date'].notna()]
+
+    # Filter the DataFrame to include only days worked (more tickets solved than the valid-day threshold)
+    with step('group'):
+        df_filtered = df[valid_workday_mask(df)].copy()
 
-    # Assign complexity levels and their sources
-    def assign_complexity(ticket_group, ticket_subject, product, action_taken):
-        if pd.isna(ticket_group) or pd.isna(ticket_subject):
-            return None, None  # Return None if any required value is NaN
-
-        ticket_groups = [group.strip() for group in ticket_group.split(',')]
-        complexity = None  # To track the complexity score
-        actual_value = None  # To track the actual value used for categorization
-
-        # Check for specific ticket groups
-        if 'UAP' in ticket_groups:
-            complexity = 2.0
-            actual_value = ticket_group  # Use the ticket group directly
-        if 'Mobile Reconciliation' in ticket_groups:
-            complexity = 5.0
-            actual_value = ticket_group  # Use the ticket group directly
-        elif any(keyword.lower() in ticket_subject.lower() for keyword in keywords):
-            complexity = 0.0
-            actual_value = ticket_subject  # Use the ticket subject directly
-        elif pd.notna(action_taken) and any(action in action_taken for action in ['Password Reset', 'Errant Fax', 'Unlocked Account', 'Create']):
-            complexity = 15.0
-            actual_value = action_taken  # Use the action taken directly
-        elif pd.notna(action_taken) and any(action in action_taken for action in ['No Action Taken', 'Automation', 'Meter Reading']):
-            complexity = 1.0
-            actual_value = action_taken  # Use the action taken directly
-        elif pd.notna(action_taken) and any(action in action_taken for action in ['Terminated Employee Process', 'Account Created', 'Access Change', 'Add/Remove from Distribution List', 'Account Change', 'Updated DL Group', 'Added License', 'Add to Allowlist', 'Account Locked', 'HCHB', 'Contractor/Volunteer Set-Up', 'Day 1 Concierge']):
-            complexity = 20.0
-            actual_value = action_taken  # Use the action taken directly
-        elif product in high_complexity_products:
-            complexity = 75.0
-            actual_value = product  # Use the product directly
-        else:
-            complexity = 25.0
-            actual_value = ticket_subject  # Use the ticket subject as a fallback
-
-        return complexity, actual_value
-
-    # Apply the complexity function
-    df_filtered[['Complexity', 'Category']] = df_filtered.apply(
-        lambda row: assign_complexity(
-            row['Ticket group'], 
-            row['Ticket subject'], 
-            row['Product - Service Desk Tool'], 
-            row.get('Action Taken to Resolve')
-        ), axis=1, result_type='expand'
-    )
+    # Assign complexity levels and their sources (the value that decided the score)
+    with step('score'):
+        df_filtered['Complexity'], df_filtered['Category'] = score_complexity(df_filtered, COMPLEXITY_TIERS)
 
     # Categorize complexity levels into Low, Medium, and High
-    def categorize_complexity(points):
-        if points < 15:
-            return 'Low'
-        elif points <= 25:
-            return 'Medium'
-        else:
-            return 'High'
-
-    df_filtered['Complexity Category'] = df_filtered['Complexity'].apply(categorize_complexity)
-
-    # Print required details: Ticket ID, Assignee name, Category, Points
-    print("\nTicket details with complexity levels:\n")
-    for index, row in df_filtered.iterrows():
-        print(f"Ticket ID: {row['Ticket ID']}, Assignee: {row['Assignee name']}, Category: {row['Category']}, Points: {row['Complexity']}")
-
-    # Sort by Assignee name
-    df_sorted = df_filtered.sort_values(by='Assignee name')
-
-    # Prepare for totals and blank rows
-    output_data = []
-    for assignee, group in df_sorted.groupby('Assignee name'):
-        output_data.append(group)
-        total_points = group['Complexity'].sum()
-        total_row = pd.DataFrame({
-            'Ticket ID': ['Total'],
-            'Assignee name': [assignee],
-            'Category': [''],
-            'Complexity': [total_points]
-        })
-        output_data.append(total_row)
-        output_data.append(pd.DataFrame({'Ticket ID': [''], 'Assignee name': [''], 'Category': [''], 'Complexity': ['']}))  # Blank row
-
-        # Print total points for each assignee
-        print(f"Total points for {assignee}: {total_points}")
-
-    # Concatenate the output
-    final_output = pd.concat(output_data, ignore_index=True)
-
-    # Select relevant columns for the output
-    final_output = final_output[['Ticket solved - Date','Ticket ID', 'Assignee name', 'Category', 'Complexity']].copy()
-    final_output.columns = ['Date','Ticket #', 'Agent', 'Category', 'Points']
+    with step('categorize'):
+        df_filtered['Complexity Category'] = categorize_complexity(df_filtered['Complexity'])
+
+    # Required details per ticket: Ticket ID, Assignee name, Category, Points (only built when
+    # they are written to the audit file or logged)
+    if audit_enabled() or logger.isEnabledFor(logging.DEBUG):
+        details = df_filtered[['Ticket ID', 'Assignee name', 'Category', 'Complexity']]
+        write_audit(details, 'individual_categories')
+        if logger.isEnabledFor(logging.DEBUG):
+            for ticket in details.itertuples(index=False):
+                logger.debug("Ticket ID: %s, Assignee: %s, Category: %s, Points: %s", *ticket)
+
+    with step('layout'):
+        # Sort by Assignee name
+        # Ties keep the order sorting the names as text gives (sorting a categorical by its codes differs)
+        df_sorted = df_filtered.sort_values(by='Assignee name', key=lambda names: names.astype(str).where(names.notna()))
+
+        # Prepare for totals and blank rows
+        output_data = []
+        for assignee, group in df_sorted.groupby('Assignee name', observed=True):
+            output_data.append(group)
+            total_points = group['Complexity'].sum()
+            total_row = pd.DataFrame({
+                'Ticket ID': ['Total'],
+                'Assignee name': [assignee],
+                'Category': [''],
+                'Complexity': [total_points]
+            })
+            output_data.append(total_row)
+            output_data.append(pd.DataFrame({'Ticket ID': [''], 'Assignee name': [''], 'Category': [''], 'Complexity': pd.Series([None], dtype='float64')}))  # Blank row
+
+            logger.debug("Total points for %s: %s", assignee, total_points)
+
+        # Concatenate the output
+        final_output = pd.concat(output_data, ignore_index=True)
+
+        # Select relevant columns for the output
+        final_output = final_output[['Ticket solved - Date','Ticket ID', 'Assignee name', 'Category', 'Complexity']].copy()
+        final_output.columns = ['Date','Ticket #', 'Agent', 'Category', 'Points']
+
+    return final_output
+
+def add_complexity_column(input_file_path, output_file_path):
+    start = time.perf_counter()
+
+    # Load your cleaned ticket data
+    with step('load'):
+        df = read_tickets(input_file_path)
+
+    # The column names and structure of the DataFrame, when debugging
+    log_frame(logger, "Input data", df)
+
+    final_output = build_individual_report(df)
 
     # Save the updated DataFrame to a new CSV file
-    final_output.to_csv(output_file_path, index=False)
-    print(f"Updated ticket data with complexity levels saved to {output_file_path}")
+    with step('write'):
+        output_file_path = write_frame(final_output, output_file_path)
+    record_rows(len(final_output))
+    logger.info("Built the individual report for %d tickets (%d rows) in %.2fs; saved to %s",
+                len(df), len(final_output), time.perf_counter() - start, output_file_path)
 
 if __name__ == "__main__":
-    input_file = 'ticket_data.csv'  # Replace with your actual input file path
+    configure_logging()
+    input_file = config.get('input_file', 'ticket_data.csv')  # The export every mode reads (project_config)
     output_file = 'individual_complexity_data.csv'  # Specify the output file path
     add_complexity_column(input_file, output_file)
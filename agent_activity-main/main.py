@@ -1,46 +1,113 @@
+import logging
 import subprocess
 import os
+import sys
+import tempfile
 import time
 from project_config import config
+from pipeline import run_pipeline
+from scheduler import run_dag
+from incremental import run_incremental
+from streaming import run_streaming
+from batch import run_batch
+from service import run_service
+from rollup import update_rollup
+import stage_cache
+import profiling
+from frame_io import output_paths
+from pipeline_logging import configure_logging
+
+logger = logging.getLogger(__name__)
 
 def run_script(script_name):
     """Run a Python script using subprocess and return created files."""
-    result = subprocess.run(['python', script_name], capture_output=True, text=True)
-    print(result.stdout)
+    command = ['python', script_name]
+    profile_dir = config.get('profile_dir')
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        command = ['python', '-m', 'cProfile', '-o', os.path.join(profile_dir, f'{os.path.splitext(script_name)[0]}.prof'), script_name]
+
+    start = time.perf_counter()
+    peak_rss_mb = None
+    if hasattr(os, 'wait4'):
+        # Output goes to temporary files, so reaping the child with wait4 (for its own peak
+        # memory) cannot block on a full pipe
+        with tempfile.TemporaryFile('w+') as stdout, tempfile.TemporaryFile('w+') as stderr:
+            process = subprocess.Popen(command, stdout=stdout, stderr=stderr, text=True)
+            _, status, usage = os.wait4(process.pid, 0)
+            returncode = os.waitstatus_to_exitcode(status)
+            stdout.seek(0)
+            stderr.seek(0)
+            output, errors = stdout.read(), stderr.read()
+        # Peak memory of this script's process alone (KB on Linux, bytes on macOS)
+        peak_rss_mb = round(usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    else:
+        # No wait4 (Windows): no per-script memory figure
+        result = subprocess.run(command, capture_output=True, text=True)
+        returncode, output, errors = result.returncode, result.stdout, result.stderr
+
+    profiling.add_stage(script_name, {
+        'seconds': round(time.perf_counter() - start, 4),
+        'peak_rss_mb': peak_rss_mb,
+        'failed': returncode != 0
+    })
+    # The script logs to its own stdout; pass it through as is
+    print(output, end='')
     
-    if result.stderr:
-        print("Errors:", result.stderr)
+    if errors:
+        logger.error("Errors: %s", errors)
     
     # Retrieve the output files associated with this script from the config
-    created_files = config.get('output_files', {}).get(script_name, [])
+    created_files = output_paths(script_name)
     return created_files
 
-def delete_files_after_timeout(file_paths, timeout=180):
-    """Delete files after a timeout (in seconds)."""
-    print(f"Waiting {timeout // 60} minute(s) before deleting files...")
-    time.sleep(timeout)  # Wait for the specified timeout (3 minutes = 180 seconds)
+def main():
+    configure_logging()
 
-    for file_path in file_paths:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            print(f"Deleted: {file_path}")
-        else:
-            print(f"File not found: {file_path}")
+    if config.get('pipeline_mode') == 'service':
+        # Keep running and process every export dropped into 'watch_dir' (Ctrl+C to stop)
+        run_service()
+        return
 
-def main():
-    # Retrieve the list of scripts from the config file
-    scripts = config['scripts']
+    if config.get('pipeline_mode') == 'in_process':
+        # Load the export once and pass DataFrames between the stages in memory
+        all_created_files = run_pipeline()
+    elif config.get('pipeline_mode') == 'parallel':
+        # Run independent scripts at the same time on a process pool
+        all_created_files = run_dag()
+    elif config.get('pipeline_mode') == 'incremental':
+        # Score only new or changed tickets and update the stored partial aggregates
+        all_created_files = run_incremental()
+    elif config.get('pipeline_mode') == 'streaming':
+        # Read the export in chunks and keep only running per-assignee/per-day totals
+        all_created_files = run_streaming()
+    elif config.get('pipeline_mode') == 'batch':
+        # Score one combined export once and write a report per period/team in 'batch_reports'
+        all_created_files = run_batch()
+    else:
+        # Retrieve the list of scripts from the config file
+        scripts = config['scripts']
+
+        # List to hold all created files
+        all_created_files = []
+
+        for script in scripts:
+            logger.info("Running %s...", script)
+            created_files = run_script(script)
+            all_created_files.extend(created_files)
 
-    # List to hold all created files
-    all_created_files = []
+    if config.get('rollup_db'):
+        # Refresh the pre-aggregated metrics that rollup.py answers ad-hoc queries from
+        update_rollup()
 
-    for script in scripts:
-        print(f"Running {script}...")
-        created_files = run_script(script)
-        all_created_files.extend(created_files)
+    # Per-stage timings, memory and row counts of this run, for spotting slow stages
+    report_file = profiling.write_run_report(mode=config.get('pipeline_mode'), created_files=all_created_files)
+    if report_file:
+        logger.info("Run report written to %s", report_file)
 
-    # Optional: Delete files after a timeout (if necessary)
-    delete_files_after_timeout(all_created_files)
+    if config.get('cache_enabled'):
+        # Stage outputs are kept in the cache; drop entries that are old or over the limit
+        stage_cache.evict()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,117 @@
+import logging
+
+import pandas as pd
+
+from project_config import config
+from scheduler import build_graph, resolve_inputs
+import stage_cache
+import profiling
+from calculate_complexity import score_tickets
+from individual_categories import build_individual_report
+from aggregate_data import aggregate_data
+from calculate_time import calculate_time
+from convert import convert_frames
+from frame_io import read_tickets, write_frame
+from complexity_rules import cache_stats
+
+logger = logging.getLogger(__name__)
+
+# Stages whose result is the whole scored export
+SCORING_STAGES = ['calculate_complexity.py', 'individual_categories.py']
+
+# In-process pipeline: the raw export is read once and every stage hands its DataFrame
+# straight to the next one, instead of each script being started in its own interpreter
+# and re-reading the previous stage's CSV.
+
+
+def run_pipeline(input_file_path=None, write_intermediate=None):
+    """Run every stage in this process and return the list of files that were written."""
+    input_file_path = input_file_path or config.get('input_file', 'ticket_data.csv')
+    if write_intermediate is None:
+        write_intermediate = config.get('write_intermediate_files', False)
+    output_files = config.get('output_files', {})
+
+    created_files = []
+
+    # Cache keys per stage (see stage_cache); the raw export is hashed from the file actually read
+    keys = {}
+    if config.get('cache_enabled'):
+        input_files = resolve_inputs(config.get('input_files', {}), output_files, input_file_path)
+        graph = build_graph(config['scripts'], input_files, output_files)
+        keys = stage_cache.stage_keys(config['scripts'], graph, input_files)
+        if not config.get('cache_scoring_stages', False):
+            # The scored ticket frames are large and rarely reused; downstream keys still cover them
+            for script_name in SCORING_STAGES:
+                keys.pop(script_name, None)
+
+    def run_stage(script_name, stage, inputs=()):
+        """Run stage(*inputs) unless its result is cached; inputs are functions returning its input frames."""
+        key = keys.get(script_name)
+        result = stage_cache.load_result(key) if key else None
+        # Stages that write files (convert.py) cache the file list; the files themselves must be restored
+        if isinstance(result, list) and not stage_cache.restore_files(key, result):
+            result = None
+        # The stages this one needs run (and are timed) before it, and only when it has to run
+        args = [get() for get in inputs] if result is None else []
+
+        with profiling.stage(script_name) as record:
+            record['cached'] = result is not None
+            if result is None:
+                logger.debug("Running %s (in process)...", script_name)
+                result = stage(*args)
+
+                if key:
+                    stage_cache.store_result(key, result)
+                    if isinstance(result, list):
+                        stage_cache.store_files(key, result)
+            if isinstance(result, pd.DataFrame):
+                record['rows'] = len(result)
+
+            # The CSV handoff files are only needed when someone wants to inspect them
+            if write_intermediate and isinstance(result, pd.DataFrame):
+                csv_file = output_files.get(script_name, [])[0]
+                with profiling.step('write'):
+                    created_files.append(write_frame(result, csv_file))
+
+        rows = f"{len(result)} rows" if isinstance(result, pd.DataFrame) else f"{len(result)} files"
+        if record['cached']:
+            logger.info("Reusing cached result of %s (%s)", script_name, rows)
+        else:
+            logger.info("Finished %s in %.2fs (%s)", script_name, record['seconds'], rows)
+        return result
+
+    # Load the raw export once for both scoring stages, and only if one of them has to run
+    tickets = []
+
+    def load_tickets():
+        if not tickets:
+            with profiling.step('load'):
+                tickets.append(read_tickets(input_file_path))
+        return tickets[0]
+
+    # The scoring stages only run when a stage that needs them does (or their CSVs are wanted)
+    def when_needed(script_name, stage):
+        results = []
+
+        def result():
+            if not results:
+                results.append(run_stage(script_name, stage))
+            return results[0]
+        return result
+
+    complexity_df = when_needed('calculate_complexity.py', lambda: score_tickets(load_tickets()))
+    individual_df = when_needed('individual_categories.py', lambda: build_individual_report(load_tickets()))
+    if write_intermediate:
+        complexity_df()
+        individual_df()
+    aggregated_df = run_stage('aggregate_data.py', aggregate_data, [complexity_df])
+    time_df = run_stage('calculate_time.py', calculate_time, [individual_df])
+
+    xlsx_files = run_stage('convert.py', lambda: convert_frames({
+        'aggregated_data': aggregated_df,
+        'calculate_time': time_df
+    }))
+    created_files.extend(xlsx_files)
+
+    logger.debug("Scoring cache: %s", cache_stats())
+    return created_files
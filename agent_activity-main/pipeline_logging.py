@@ -0,0 +1,46 @@
+import io
+import logging
+import os
+import sys
+
+from project_config import config
+
+# Logging for the pipeline. At the default INFO level each stage reports a one-line summary
+# (rows and timing). Per-ticket detail is only formatted at DEBUG level, or written in one go
+# to a CSV in 'audit_dir' when that is set, so normal runs don't pay for it.
+
+LOG_FORMAT = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+
+
+def configure_logging(level=None):
+    """Set up console logging at the configured level (does nothing if logging is already set up)."""
+    level = level or config.get('log_level', 'INFO')
+    # stdout, so main.run_script shows it as the script's output rather than as errors
+    logging.basicConfig(level=level, format=LOG_FORMAT, stream=sys.stdout)
+
+
+def audit_enabled():
+    """Whether per-ticket details are written to 'audit_dir'."""
+    return bool(config.get('audit_dir'))
+
+
+def write_audit(df, name):
+    """Bulk-write per-ticket details to '<audit_dir>/<name>_audit.csv' if an audit directory is configured."""
+    audit_dir = config.get('audit_dir')
+    if not audit_dir:
+        return None
+
+    os.makedirs(audit_dir, exist_ok=True)
+    path = os.path.join(audit_dir, f'{name}_audit.csv')
+    df.to_csv(path, index=False)
+    logging.getLogger(__name__).info("Per-ticket audit written to %s", path)
+    return path
+
+
+def log_frame(logger, title, df):
+    """Log a DataFrame's columns, info() and head() at DEBUG level."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    buffer = io.StringIO()
+    df.info(buf=buffer)
+    logger.debug("%s\nColumns: %s\n%s\n%s", title, df.columns.tolist(), buffer.getvalue(), df.head())
@@ -0,0 +1,127 @@
+import cProfile
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from project_config import config
+
+# Timing instrumentation for the pipeline.
+#
+# stage() times one pipeline stage: its wall time, its peak memory and the rows it produced.
+# step() inside a stage adds the time of one part of it (load, validate, score, categorize,
+# group, write) to that stage's record. With 'profile_dir' set every stage also runs under
+# cProfile and its profile is dumped to '<profile_dir>/<stage>.prof'. main.main writes all
+# records of the run to 'run_report' as JSON, so slow stages can be spotted and compared
+# between runs.
+
+_stages = {}
+_current = []  # Records of the stages being timed, innermost last
+
+
+def new_record(**details):
+    """A stage record with every key the run report reads, plus details such as 'cached'."""
+    return dict({'seconds': None, 'peak_rss_mb': None, 'rows': None, 'steps': {}}, **details)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process since the last reset_peak_rss(), in MB (None if unknown)."""
+    try:
+        with open('/proc/self/status') as f:
+            return next(int(line.split()[1]) for line in f if line.startswith('VmHWM:')) / 1024
+    except (OSError, StopIteration):
+        pass
+    try:
+        import resource  # POSIX only
+    except ImportError:
+        return None
+    # No /proc: the peak of the whole process so far (KB on Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def reset_peak_rss():
+    """Start measuring the peak from the current memory use, where Linux allows it."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+@contextmanager
+def stage(name):
+    """Time a pipeline stage; yields its record, whose 'rows' the caller may fill in."""
+    record = new_record()
+    profile_dir = config.get('profile_dir')
+    profiler = cProfile.Profile() if profile_dir and not _current else None
+
+    reset_peak_rss()
+    _current.append(record)
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield record
+    finally:
+        if profiler:
+            profiler.disable()
+            os.makedirs(profile_dir, exist_ok=True)
+            profiler.dump_stats(os.path.join(profile_dir, f'{os.path.splitext(name)[0]}.prof'))
+        record['seconds'] = round(time.perf_counter() - start, 4)
+        peak = peak_rss_mb()
+        record['peak_rss_mb'] = round(peak, 1) if peak is not None else None
+        _current.pop()
+        _stages[name] = record
+
+
+@contextmanager
+def step(name):
+    """Add the time spent in the block to step 'name' of the current stage (if any)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if _current:
+            steps = _current[-1]['steps']
+            steps[name] = round(steps.get(name, 0) + time.perf_counter() - start, 4)
+
+
+def record_rows(rows):
+    """Set the row count of the current stage."""
+    if _current:
+        _current[-1]['rows'] = rows
+
+
+def add_stage(name, record):
+    """Add a stage record measured elsewhere (e.g. in a worker process), or of a cached or failed stage."""
+    _stages[name] = new_record(**record)
+
+
+def stage_records():
+    return dict(_stages)
+
+
+def reset():
+    _stages.clear()
+
+
+def write_run_report(path=None, **details):
+    """Write the stage records of this run, with details such as the mode, as JSON. Returns the path."""
+    path = path or config.get('run_report', 'run_report.json')
+    if not path:
+        return None
+
+    stages = stage_records()
+    report = dict(
+        details,
+        finished=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        total_seconds=round(sum(s['seconds'] or 0 for s in stages.values()), 4),
+        peak_rss_mb=round(max([s['peak_rss_mb'] or 0 for s in stages.values()] + [0]), 1),
+        stages=stages
+    )
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return path
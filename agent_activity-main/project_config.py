@@ -1,4 +1,125 @@
 config = {
+    # Raw Zendesk export every run starts from
+    'input_file': 'ticket_data.csv',
+    # 'in_process' runs every stage in one interpreter and hands DataFrames between them;
+    # 'parallel' runs the scripts below on a process pool, independent ones at the same time;
+    # 'subprocess' runs each script below in its own python process, one after another;
+    # 'incremental' scores only tickets that are new or changed since the last run (see incremental.py);
+    # 'streaming' reads the export in chunks for exports larger than memory (see streaming.py);
+    # 'batch' writes a report per period/team in 'batch_reports' from one export (see batch.py);
+    # 'service' keeps running and processes every export dropped into 'watch_dir' (see service.py)
+    'pipeline_mode': 'in_process',
+    # Reports of 'batch' mode, each written to '<batch_output_dir>/<name>/'. 'start'/'end'
+    # (inclusive dates) and 'assignees' are optional filters, e.g.
+    #   {'name': 'service-desk-2024-01', 'start': '2024-01-01', 'end': '2024-01-31',
+    #    'assignees': ['Ryan Schlenz', ...]}
+    'batch_reports': [],
+    'batch_output_dir': 'reports',
+    # 'service' mode: the inbox polled every 'watch_poll_interval' seconds, how long an export
+    # must stay unchanged before it is processed, where each job's reports go, and how many
+    # seconds they are kept
+    'watch_dir': 'inbox',
+    'watch_poll_interval': 1.0,
+    'watch_debounce': 2.0,
+    'watch_output_dir': 'outbox',
+    'output_retention': 180,
+    # SQLite file of pre-aggregated metrics (Assignee x date x complexity category x product)
+    # refreshed from the export after every run, for ad-hoc queries with rollup.py; None = off
+    'rollup_db': None,
+    # Rows per chunk in 'streaming' mode (and when building the rollup)
+    'chunk_size': 100_000,
+    # Worker processes for 'parallel', 'batch' and 'service' modes (None = one per CPU)
+    'max_workers': None,
+    # Processes that score the tickets of one export (1 = score in the calling process,
+    # None = one per CPU); used for exports of at least 'parallel_scoring_min_rows' rows
+    'scoring_workers': 1,
+    'parallel_scoring_min_rows': 100_000,
+    # Evaluate the scoring rules once per distinct combination of the columns they look at
+    'memoize_rule_combinations': True,
+    # Write the intermediate CSVs (complexity_data.csv, ...) when running in process
+    'write_intermediate_files': False,
+    # Format of the files stages hand to each other: 'csv', or 'parquet' / 'feather' (needs pyarrow)
+    # for compact typed columnar files that convert.py exports to CSV/Excel at the end
+    'intermediate_format': 'csv',
+    # Excel writer used by convert.py: 'openpyxl_write_only' or 'xlsxwriter' (needs xlsxwriter)
+    # stream rows to the file; 'openpyxl' (pandas' to_excel) builds the whole workbook in memory first
+    'excel_engine': 'openpyxl_write_only',
+    # Put every report into this one workbook, a sheet each, instead of one .xlsx per report
+    'excel_workbook': None,
+    # Where 'incremental' mode keeps per-ticket scores and per-assignee/per-day partial aggregates
+    'incremental_store': 'incremental_store',
+    # True when each export holds the full history, so tickets missing from it are removed from
+    # the store; False when exports only hold the latest tickets
+    'incremental_full_export': True,
+    # Reuse stage results when the input export, the code and the rules are unchanged
+    # ('in_process' and 'parallel' modes). Cache entries unused for 'cache_max_age' seconds,
+    # or beyond the newest 'cache_max_entries', are evicted at the end of each run.
+    'cache_enabled': True,
+    'cache_dir': '.pipeline_cache',
+    'cache_max_age': 7 * 24 * 3600,
+    'cache_max_entries': 50,
+    # Also cache the scored ticket frames of calculate_complexity.py and individual_categories.py
+    # in 'in_process' mode. They are as large as the export and their keys change with every new
+    # export, so by default only the small downstream results are cached.
+    'cache_scoring_stages': False,
+    # Shared code and rule configuration that every stage's cache key depends on: the scoring
+    # rules, the valid-workday threshold, and the loading and dtypes of every stage's frames
+    'cache_code_files': ['complexity_rules.py', 'project_config.py', 'workdays.py', 'frame_io.py'],
+    # Complexity scoring rules. Tiers are checked in order and the first match sets the score;
+    # tickets no tier matches score 'default_score'. Match types: 'group' (one of the
+    # comma separated groups is a value), 'keyword' (case-insensitive substring), 'contains'
+    # (case-sensitive substring) and 'exact'. 'reports' lists how each scoring stage differs
+    # from these tiers: tiers it leaves out and extra values for a tier.
+    'complexity_rules': {
+        'default_score': 25.0,
+        'tiers': [
+            {'name': 'uap', 'column': 'Ticket group', 'match': 'group', 'values': ['UAP'], 'score': 2.0},
+            {'name': 'mobile_reconciliation', 'column': 'Ticket group', 'match': 'group',
+             'values': ['Mobile Reconciliation'], 'score': 5.0},
+            # Calls, voicemails and callbacks
+            {'name': 'calls', 'column': 'Ticket subject', 'match': 'keyword', 'score': 0.0, 'values': [
+                'Voicemail', 'voice mail', 'vm', 'Call with caller', 'Call With', 'Abandoned Call',
+                'Missed Call', 'call back', 'CallBack', 'Conversation with', 'Unknown caller'
+            ]},
+            {'name': 'password_reset_actions', 'column': 'Action Taken to Resolve', 'match': 'contains',
+             'score': 15.0, 'values': ['Password Reset', 'Errant Fax', 'Unlocked Account', 'Create']},
+            {'name': 'no_action', 'column': 'Action Taken to Resolve', 'match': 'contains', 'score': 1.0,
+             'values': ['No Action Taken', 'Automation', 'Meter Reading']},
+            {'name': 'account_changes', 'column': 'Action Taken to Resolve', 'match': 'contains',
+             'score': 20.0, 'values': [
+                'Access Change', 'Add/Remove from Distribution List', 'Account Change', 'Updated DL Group',
+                'Added License', 'Add to Allowlist', 'Account Locked', 'HCHB', 'Contractor/Volunteer Set-Up',
+                'Day 1 Concierge'
+            ]},
+            # High complexity products
+            {'name': 'high_complexity_products', 'column': 'Product - Service Desk Tool', 'match': 'exact',
+             'score': 75.0, 'values': [
+                'ADUC', 'Exchange', 'Fuze', 'HCHB', 'MOBI', 'Printer/Scanner/Copier', 'Teams', 'Zendesk',
+                'Windows', 'Citrix', 'Intune', 'Network'
+            ]}
+        ],
+        'reports': {
+            'calculate_complexity': {},
+            # The individual report never scored the UAP group (its checks overwrote it) and
+            # counts two more account actions
+            'individual_categories': {
+                'exclude': ['uap'],
+                'extra_values': {'account_changes': ['Terminated Employee Process', 'Account Created']}
+            }
+        }
+    },
+    # A day counts as worked for an assignee when they solved more than this many tickets on it
+    'valid_day_ticket_threshold': 5,
+    # Logging level: INFO prints a one-line summary per stage, DEBUG adds DataFrame structure
+    # and a line per ticket. With 'audit_dir' set, the per-ticket details are also written
+    # there as CSV files in one go.
+    'log_level': 'INFO',
+    'audit_dir': None,
+    # main.py writes the timings, peak memory and row counts of every stage (and of the steps
+    # inside it) to this JSON file at the end of a run. With 'profile_dir' set, each stage is
+    # also run under cProfile and its profile saved there as '<stage>.prof'.
+    'run_report': 'run_report.json',
+    'profile_dir': None,
     'scripts': [
         'calculate_complexity.py',
         'individual_categories.py',
@@ -14,6 +135,14 @@ config = {
         'aggregated_data.xlsx',
         'calculate_time.xlsx'
     ],
+    # Files each script reads; together with 'output_files' this defines the order scripts can run in
+    'input_files': {
+        'calculate_complexity.py': ['ticket_data.csv'],
+        'individual_categories.py': ['ticket_data.csv'],
+        'aggregate_data.py': ['complexity_data.csv'],
+        'calculate_time.py': ['individual_complexity_data.csv'],
+        'convert.py': ['aggregated_data.csv', 'calculate_time.csv']
+    },
     'output_files': {
         'calculate_complexity.py': ['complexity_data.csv'],
         'individual_categories.py': ['individual_complexity_data.csv'],
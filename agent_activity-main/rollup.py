@@ -0,0 +1,217 @@
+import logging
+import sqlite3
+import sys
+import time
+from contextlib import closing
+
+import pandas as pd
+
+from project_config import config
+from frame_io import read_tickets
+from complexity_rules import categorize_complexity
+from incremental import score_for_partials, time_report, DAY_KEY, PARTIAL_COLUMNS
+from aggregate_data import aggregate_daily
+from pipeline_logging import configure_logging
+import profiling
+
+logger = logging.getLogger(__name__)
+
+# Rollup store: pre-aggregated ticket metrics for ad-hoc questions without rerunning the pipeline.
+#
+# update_rollup scores the export (with both rule sets, as incremental mode does) and writes
+# one row per Assignee x solved date x complexity category x product to the SQLite file
+# 'rollup_db': tickets solved, ticket rows, complexity sum/count and individual report points.
+# The export is read in chunks, so the store can be fed from exports of any size. Queries
+# only read the (small) rollup table: aggregate_report and time_report_between answer exactly what
+# aggregate_data.py and calculate_time.py would for the tickets of a date range, and
+# rollup_slice sums the metrics by any of the DIMENSIONS (e.g. points per agent per week).
+
+# Dimensions a slice can be grouped by, as SQL expressions over the rollup table
+DIMENSIONS = {
+    'assignee': 'assignee',
+    'day': 'day',
+    'week': "date(day, '-6 days', 'weekday 1')",  # The Monday the week starts on
+    'month': "strftime('%Y-%m', day)",
+    'category': 'category',
+    'product': 'product'
+}
+
+# Rollup columns and the partial columns of incremental.py they hold
+MEASURES = {
+    'tickets_solved': 'Tickets solved',
+    'tickets': 'Ticket count',
+    'complexity_sum': 'Complexity sum',
+    'complexity_count': 'Complexity count',
+    'points': 'Points'
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup (
+    assignee TEXT NOT NULL,
+    solved_date TEXT,  -- 'Ticket solved - Date' as exported
+    day TEXT,          -- The same date as YYYY-MM-DD, NULL when it is not a valid date
+    category TEXT NOT NULL,
+    product TEXT,
+    tickets_solved NUMERIC,
+    tickets INTEGER,
+    complexity_sum REAL,
+    complexity_count INTEGER,
+    points REAL
+);
+CREATE INDEX IF NOT EXISTS rollup_day ON rollup (day);
+CREATE INDEX IF NOT EXISTS rollup_assignee_day ON rollup (assignee, day);
+"""
+
+CUBE_KEY = ['Assignee name', 'Ticket solved - Date', 'Complexity Category', 'Product - Service Desk Tool']
+
+
+def rollup_path():
+    return config.get('rollup_db') or 'rollup.sqlite'
+
+
+def connect(path=None):
+    connection = sqlite3.connect(path or rollup_path())
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def cube(df):
+    """Per-Assignee/date/category/product partial aggregates of a batch of tickets."""
+    scored = score_for_partials(df)
+    scored['Complexity Category'] = categorize_complexity(scored['Complexity'])
+    scored['Product - Service Desk Tool'] = df['Product - Service Desk Tool']
+    # Text keys, so the cubes of different chunks line up when they are merged
+    scored[CUBE_KEY] = scored[CUBE_KEY].astype(object)
+
+    scored = scored[scored['Assignee name'].notna()]
+    return scored.groupby(CUBE_KEY, dropna=False).agg(**{
+        'Tickets solved': ('Tickets solved', 'sum'),
+        'Ticket count': ('Tickets solved', 'size'),
+        'Complexity sum': ('Complexity', 'sum'),
+        'Complexity count': ('Complexity', 'count'),
+        'Points': ('Points', 'sum')
+    }).reset_index()
+
+
+def update_rollup(input_file_path=None, full_export=None, path=None):
+    """Write the rollup of an export to the store and return the number of rollup rows written."""
+    input_file_path = input_file_path or config.get('input_file', 'ticket_data.csv')
+    full_export = config.get('incremental_full_export', True) if full_export is None else full_export
+
+    with profiling.stage('rollup') as record:
+        rows = 0
+        parts = []
+        for chunk in read_tickets(input_file_path, chunksize=config.get('chunk_size', 100_000)):
+            with profiling.step('score'):
+                parts.append(cube(chunk))
+            rows += len(chunk)
+        record['rows'] = rows
+
+        with profiling.step('group'):
+            rolled = pd.concat(parts, ignore_index=True).groupby(CUBE_KEY, dropna=False).sum().reset_index()
+            rolled = pd.DataFrame({
+                'assignee': rolled['Assignee name'],
+                'solved_date': rolled['Ticket solved - Date'],
+                'day': pd.to_datetime(rolled['Ticket solved - Date'], errors='coerce').dt.strftime('%Y-%m-%d'),
+                'category': rolled['Complexity Category'],
+                'product': rolled['Product - Service Desk Tool'],
+                **{column: rolled[partial] for column, partial in MEASURES.items()}
+            })
+
+        with profiling.step('write'), closing(connect(path)) as connection, connection:
+            if full_export:
+                connection.execute("DELETE FROM rollup")
+            else:
+                # The export holds the latest days only: replace those and keep the rest
+                dates = rolled['solved_date'].dropna().unique().tolist()
+                connection.executemany("DELETE FROM rollup WHERE solved_date = ?", [(d,) for d in dates])
+                if rolled['solved_date'].isna().any():
+                    connection.execute("DELETE FROM rollup WHERE solved_date IS NULL")
+            rolled.to_sql('rollup', connection, if_exists='append', index=False)
+
+    logger.info("Rollup of %d tickets written to %s (%d rows)", rows, path or rollup_path(), len(rolled))
+    return len(rolled)
+
+
+def _where(start=None, end=None, assignees=None):
+    """SQL filter and parameters for an (inclusive) date range and a list of assignees."""
+    clauses, params = [], []
+    # Tickets without a valid date fall outside every range
+    if start:
+        clauses.append("day >= ?")
+        params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+    if end:
+        clauses.append("day <= ?")
+        params.append(pd.Timestamp(end).strftime('%Y-%m-%d'))
+    if assignees is not None:
+        clauses.append(f"assignee IN ({', '.join('?' * len(assignees))})")
+        params.extend(assignees)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def daily_partials(start=None, end=None, assignees=None, path=None):
+    """The per-Assignee/per-day partials (as in incremental.py) of a date range, from the store."""
+    where, params = _where(start, end, assignees)
+    sums = ", ".join(f'SUM({column}) AS "{partial}"' for column, partial in MEASURES.items())
+    query = (f'SELECT assignee AS "{DAY_KEY[0]}", solved_date AS "{DAY_KEY[1]}", {sums} '
+             f'FROM rollup{where} GROUP BY assignee, solved_date ORDER BY assignee, solved_date')
+    with closing(connect(path)) as connection:
+        return pd.read_sql_query(query, connection, params=params)[DAY_KEY + PARTIAL_COLUMNS]
+
+
+def aggregate_report(start=None, end=None, assignees=None, path=None):
+    """The aggregate_data report for the tickets solved between start and end (inclusive)."""
+    return aggregate_daily(daily_partials(start, end, assignees, path))
+
+
+def time_report_between(start=None, end=None, assignees=None, path=None):
+    """The calculate_time report for the tickets solved between start and end (inclusive)."""
+    return time_report(daily_partials(start, end, assignees, path))
+
+
+def rollup_slice(by, start=None, end=None, assignees=None, path=None):
+    """Tickets, points and mean complexity per combination of the DIMENSIONS in by."""
+    unknown = [name for name in by if name not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown rollup dimension(s) {unknown}; choose from {list(DIMENSIONS)}")
+
+    where, params = _where(start, end, assignees)
+    keys = ", ".join(f'{DIMENSIONS[name]} AS "{name}"' for name in by)
+    group = ", ".join(f'"{name}"' for name in by)
+    query = (f'SELECT {keys}, SUM(tickets_solved) AS tickets_solved, SUM(tickets) AS tickets, '
+             f'SUM(points) AS points, ROUND(SUM(complexity_sum) / SUM(complexity_count), 1) AS mean_complexity '
+             f'FROM rollup{where} GROUP BY {group} ORDER BY {group}')
+    with closing(connect(path)) as connection:
+        return pd.read_sql_query(query, connection, params=params)
+
+
+def main():
+    # Usage: python rollup.py build [export]                 (writes the rollup of the export)
+    #        python rollup.py aggregate [start] [end]        (the aggregate_data report)
+    #        python rollup.py time [start] [end]             (the calculate_time report)
+    #        python rollup.py slice <dimensions> [start] [end], e.g. slice assignee,week 2024-01-01 2024-03-31
+    configure_logging()
+    command = sys.argv[1] if len(sys.argv) > 1 else 'build'
+    args = sys.argv[2:]
+
+    if command == 'build':
+        update_rollup(args[0] if args else None)
+        return
+
+    start = time.perf_counter()
+    if command == 'aggregate':
+        result = aggregate_report(*args[:2])
+    elif command == 'time':
+        result = time_report_between(*args[:2])
+    elif command == 'slice':
+        result = rollup_slice(args[0].split(','), *args[1:3])
+    else:
+        raise SystemExit(f"Unknown command {command!r}; use build, aggregate, time or slice")
+
+    print(result.to_csv(index=False), end='')
+    # On stderr, so the CSV on stdout can be redirected to a file as is
+    print(f"Answered from {rollup_path()} in {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
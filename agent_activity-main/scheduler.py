@@ -0,0 +1,130 @@
+import logging
+import os
+import runpy
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from project_config import config
+import stage_cache
+import profiling
+from frame_io import output_paths
+
+logger = logging.getLogger(__name__)
+
+# Dependency-graph scheduler for the pipeline scripts.
+#
+# Each script declares the files it reads ('input_files') and writes ('output_files') in
+# project_config. A script depends on every script that writes one of its inputs; inputs
+# nobody writes (ticket_data.csv) must already exist. Scripts whose dependencies have
+# finished are run concurrently on a process pool, so calculate_complexity.py and
+# individual_categories.py (and then aggregate_data.py and calculate_time.py) overlap.
+
+
+def build_graph(scripts, input_files, output_files):
+    """Return {script: set of scripts it depends on} for the given scripts."""
+    producers = {}
+    for script in scripts:
+        for output_file in output_files.get(script, []):
+            producers[output_file] = script
+
+    graph = {}
+    for script in scripts:
+        graph[script] = {producers[f] for f in input_files.get(script, []) if f in producers} - {script}
+
+    # Make sure the graph can actually be scheduled
+    remaining = dict(graph)
+    while remaining:
+        ready = [script for script, deps in remaining.items() if not deps & remaining.keys()]
+        if not ready:
+            raise ValueError(f"Pipeline scripts have a circular dependency: {sorted(remaining)}")
+        for script in ready:
+            del remaining[script]
+
+    return graph
+
+
+def resolve_inputs(input_files, output_files, input_file_path=None):
+    """input_files with the raw export (the input no script writes) replaced by the file actually read."""
+    input_file_path = input_file_path or config.get('input_file', 'ticket_data.csv')
+    produced = {f for files in output_files.values() for f in files}
+    return {script: [f if f in produced else input_file_path for f in files] for script, files in input_files.items()}
+
+
+def run_stage(script_name):
+    """Run one pipeline script inside a pool worker and return its timing record (see profiling)."""
+    with profiling.stage(script_name) as record:
+        # Same as `python script_name`, but the worker keeps pandas imported between scripts
+        runpy.run_path(script_name, run_name='__main__')
+    return record
+
+
+def run_dag(scripts=None, max_workers=None):
+    """Run the pipeline scripts in dependency order, in parallel where possible. Returns created files."""
+    scripts = scripts or config['scripts']
+    graph = build_graph(scripts, config.get('input_files', {}), config.get('output_files', {}))
+    output_files = {script: output_paths(script) for script in scripts}
+    if config.get('cache_enabled'):
+        input_files = resolve_inputs(config.get('input_files', {}), config.get('output_files', {}))
+        keys = stage_cache.stage_keys(scripts, graph, input_files)
+    else:
+        keys = {}
+    max_workers = max_workers or config.get('max_workers') or os.cpu_count()
+
+    done, failed, timings = set(), set(), {}
+    created_files = []
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        running = {}
+        pending = list(scripts)
+
+        while pending or running:
+            # Skip scripts whose inputs will never be produced
+            for script in [s for s in pending if graph[s] & failed]:
+                logger.warning("Skipping %s: an upstream script failed", script)
+                pending.remove(script)
+                failed.add(script)
+
+            # Start everything whose dependencies have finished
+            for script in [s for s in pending if graph[s] <= done]:
+                pending.remove(script)
+                if script in keys and stage_cache.restore_files(keys[script], output_files.get(script, [])):
+                    logger.info("Reusing cached outputs of %s", script)
+                    timings[script] = 'cached'
+                    profiling.add_stage(script, {'cached': True})
+                    done.add(script)
+                    created_files.extend(output_files.get(script, []))
+                    continue
+                logger.info("Running %s...", script)
+                running[executor.submit(run_stage, script)] = script
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                script = running.pop(future)
+                try:
+                    record = future.result()
+                except Exception as e:
+                    logger.error("Errors: %s failed: %r", script, e)
+                    profiling.add_stage(script, {'failed': True, 'error': repr(e)})
+                    failed.add(script)
+                    continue
+                timings[script] = record['seconds']
+                profiling.add_stage(script, record)
+                done.add(script)
+                created_files.extend(output_files.get(script, []))
+                if script in keys:
+                    stage_cache.store_files(keys[script], output_files.get(script, []))
+
+    # Per-stage timings
+    lines = ["Stage timings:"]
+    for script in scripts:
+        status = timings.get(script, 'failed')
+        status = f"{status:.2f}s" if isinstance(status, float) else status
+        lines.append(f"  {script:<28} {status}")
+    lines.append(f"  {'total':<28} {time.perf_counter() - start:.2f}s")
+    logger.info("\n".join(lines))
+
+    return created_files
@@ -0,0 +1,184 @@
+import asyncio
+import itertools
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from project_config import config
+from frame_io import read_tickets
+from incremental import score_for_partials, partials, write_reports
+from batch import run_batch
+from pipeline_logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# Service mode: a long-running process that turns exports into reports as they arrive.
+#
+# The service polls 'watch_dir' for .csv exports. A file is queued once its size and
+# modification time have not changed for 'watch_debounce' seconds, so a burst of writes (or a
+# file still being copied in) is handled once, when it is complete. Jobs are run on a process
+# pool that is started once and kept, so pandas is imported per worker and not per job, and
+# the event loop stays free to keep watching while a job is scored. Each job writes its
+# reports to its own directory under 'watch_output_dir' (with 'batch_reports' set, one
+# report per entry), and the export is moved to 'processed/' or 'failed/' in the inbox.
+# Outputs are deleted 'output_retention' seconds later by a timer on the event loop instead
+# of a blocking sleep.
+
+
+def process_export(input_file_path, output_dir):
+    """Write the reports for one export to output_dir. Runs in a pool worker; returns the files."""
+    if config.get('batch_reports'):
+        return run_batch(input_file_path, output_dir=output_dir, max_workers=1)
+
+    os.makedirs(output_dir, exist_ok=True)
+    daily = partials(score_for_partials(read_tickets(input_file_path)))
+    return write_reports(daily, output_dir)
+
+
+async def watch_inbox(inbox, queue, poll_interval, debounce):
+    """Queue every .csv export in inbox once it has stopped changing for debounce seconds."""
+    loop = asyncio.get_running_loop()
+    seen = {}  # Path -> (size and mtime, when they were first seen)
+    queued = set()
+    unreadable = False  # Log an unreadable inbox once, not on every poll
+
+    while True:
+        now = loop.time()
+        present = set()
+        try:
+            entries = list(os.scandir(inbox))
+            unreadable = False
+        except OSError as e:
+            # E.g. the inbox was removed or is being recreated; try again on the next poll
+            if not unreadable:
+                logger.error("Errors: cannot read inbox %s: %r", inbox, e)
+            unreadable = True
+            entries = []
+        for entry in entries:
+            try:
+                if not (entry.is_file() and entry.name.endswith('.csv')):
+                    continue
+                stat = entry.stat()
+            except OSError:
+                # Gone between scandir and stat
+                continue
+            present.add(entry.path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+
+            previous = seen.get(entry.path)
+            if previous is None or previous[0] != signature:
+                # New or still being written: start the debounce period (again)
+                seen[entry.path] = (signature, now)
+            elif now - previous[1] >= debounce and entry.path not in queued:
+                queued.add(entry.path)
+                await queue.put(entry.path)
+
+        # Exports moved away after their job can arrive again under the same name
+        seen = {path: value for path, value in seen.items() if path in present}
+        queued &= present
+        await asyncio.sleep(poll_interval)
+
+
+async def expire(path, delay):
+    """Delete a job's output directory after delay seconds."""
+    await asyncio.sleep(delay)
+    shutil.rmtree(path, ignore_errors=True)
+    logger.info("Deleted: %s", path)
+
+
+def move_export(input_file_path, folder):
+    """Move a handled export to a subfolder of the inbox; a failed move is logged, not raised."""
+    target_dir = os.path.join(os.path.dirname(input_file_path), folder)
+    try:
+        os.makedirs(target_dir, exist_ok=True)
+        os.replace(input_file_path, os.path.join(target_dir, os.path.basename(input_file_path)))
+    except OSError as e:
+        # E.g. the export was removed or the inbox is read-only; the job worker must keep running
+        logger.error("Errors: could not move %s to %s: %r", input_file_path, target_dir, e)
+
+
+async def run_jobs(queue, executor, output_dir, retention, timers, done, job_ids):
+    """Take exports off the queue and process them one at a time on the executor."""
+    loop = asyncio.get_running_loop()
+    while True:
+        input_file_path = await queue.get()
+        stem = os.path.splitext(os.path.basename(input_file_path))[0]
+        # Unique per job, so a later export with the same name never shares (or expires) its outputs
+        job_dir = os.path.join(output_dir, f"{stem}-{time.strftime('%Y%m%d-%H%M%S')}-{next(job_ids)}")
+
+        start = time.perf_counter()
+        try:
+            created_files = await loop.run_in_executor(executor, process_export, input_file_path, job_dir)
+        except Exception as e:
+            logger.error("Errors: %s failed: %r", input_file_path, e)
+            shutil.rmtree(job_dir, ignore_errors=True)
+            move_export(input_file_path, 'failed')
+        else:
+            logger.info("Processed %s in %.2fs: %d files in %s",
+                        input_file_path, time.perf_counter() - start, len(created_files), job_dir)
+            move_export(input_file_path, 'processed')
+            if retention:
+                timer = asyncio.create_task(expire(job_dir, retention))
+                timers.add(timer)
+                timer.add_done_callback(timers.discard)
+        finally:
+            done['jobs'] += 1
+            queue.task_done()
+            if done['jobs'] == done['limit']:
+                done['event'].set()
+
+
+async def serve(inbox=None, output_dir=None, max_jobs=None):
+    """Watch the inbox and process exports until cancelled (or until max_jobs have been processed)."""
+    inbox = inbox or config.get('watch_dir', 'inbox')
+    output_dir = output_dir or config.get('watch_output_dir', 'outbox')
+    workers = config.get('max_workers') or os.cpu_count()
+    retention = config.get('output_retention', 180)
+    os.makedirs(inbox, exist_ok=True)
+
+    queue = asyncio.Queue()
+    timers = set()
+    done = {'jobs': 0, 'limit': max_jobs, 'event': asyncio.Event()}
+    job_ids = itertools.count()
+
+    logger.info("Watching %s for exports (reports go to %s)", inbox, output_dir)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        tasks = [asyncio.create_task(watch_inbox(
+            inbox, queue, config.get('watch_poll_interval', 1.0), config.get('watch_debounce', 2.0)
+        ))]
+        tasks += [asyncio.create_task(run_jobs(queue, executor, output_dir, retention, timers, done, job_ids))
+                  for _ in range(workers)]
+        try:
+            # Stop when max_jobs are done, or when the watcher or a job worker dies unexpectedly
+            finished = asyncio.create_task(done['event'].wait())
+            await asyncio.wait(tasks + [finished], return_when=asyncio.FIRST_COMPLETED)
+            finished.cancel()
+            for task in tasks:
+                if task.done() and not task.cancelled():
+                    logger.error("Errors: service task stopped: %r", task.exception())
+                    raise RuntimeError("The watch-folder service stopped unexpectedly") from task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Outputs of the last jobs are kept for their full retention period
+    if timers:
+        await asyncio.gather(*timers, return_exceptions=True)
+    return done['jobs']
+
+
+def run_service(inbox=None, output_dir=None, max_jobs=None):
+    """Run the watch-folder service (Ctrl+C to stop). Returns the number of jobs processed."""
+    try:
+        return asyncio.run(serve(inbox, output_dir, max_jobs))
+    except KeyboardInterrupt:
+        logger.info("Service stopped")
+        return None
+
+
+if __name__ == "__main__":
+    configure_logging()
+    run_service()
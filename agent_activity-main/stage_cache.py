@@ -0,0 +1,124 @@
+import hashlib
+import logging
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from project_config import config
+
+logger = logging.getLogger(__name__)
+
+# Content-hashed cache of pipeline stage results.
+#
+# A stage's key is a hash of its own script, the shared code and rule configuration
+# ('cache_code_files'), the contents of the raw files it reads, and the keys of the stages it
+# depends on. When ticket_data.csv and the rules are unchanged every key matches and the stored
+# outputs are reused instead of recomputing the stage. Each key is a directory under
+# 'cache_dir' holding the stage's output files (or its pickled DataFrame for the in-process
+# runner, which by default leaves out the export-sized scored frames, see
+# 'cache_scoring_stages'); old entries are evicted by age and count.
+
+
+def cache_dir():
+    return config.get('cache_dir', '.pipeline_cache')
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stage_keys(scripts, graph, input_files):
+    """Return {script: cache key} for every script, given the dependency graph from build_graph."""
+    code_digest = hashlib.sha256()
+    for code_file in config.get('cache_code_files', []):
+        code_digest.update(file_digest(code_file).encode())
+
+    file_digests = {}
+    keys = {}
+
+    def key_for(script):
+        if script not in keys:
+            digest = hashlib.sha256(code_digest.digest())
+            digest.update(file_digest(script).encode())
+            # Raw inputs are hashed by content; files written by other stages are covered by their key
+            produced = {f for dep in graph[script] for f in config.get('output_files', {}).get(dep, [])}
+            for input_file in sorted(set(input_files.get(script, [])) - produced):
+                if input_file not in file_digests:
+                    file_digests[input_file] = file_digest(input_file)
+                digest.update(f'{input_file}:{file_digests[input_file]}'.encode())
+            for dep in sorted(graph[script]):
+                digest.update(key_for(dep).encode())
+            keys[script] = digest.hexdigest()
+        return keys[script]
+
+    for script in scripts:
+        key_for(script)
+    return keys
+
+
+def restore_files(key, file_paths):
+    """Copy a stage's cached output files into place. Returns False on a cache miss."""
+    entry = os.path.join(cache_dir(), key)
+    cached = [os.path.join(entry, os.path.basename(path)) for path in file_paths]
+    if not file_paths or not all(os.path.exists(path) for path in cached):
+        return False
+
+    for cached_path, path in zip(cached, file_paths):
+        shutil.copyfile(cached_path, path)
+    os.utime(entry)  # Mark as recently used
+    return True
+
+
+def store_files(key, file_paths):
+    """Save a stage's output files under its key."""
+    entry = os.path.join(cache_dir(), key)
+    os.makedirs(entry, exist_ok=True)
+    for path in file_paths:
+        if os.path.exists(path):
+            shutil.copyfile(path, os.path.join(entry, os.path.basename(path)))
+
+
+def load_result(key):
+    """Return the cached result of an in-process stage, or None on a cache miss."""
+    path = os.path.join(cache_dir(), key, 'result.pkl')
+    if not os.path.exists(path):
+        return None
+    os.utime(os.path.dirname(path))
+    return pd.read_pickle(path)
+
+
+def store_result(key, result):
+    """Save the result of an in-process stage under its key."""
+    entry = os.path.join(cache_dir(), key)
+    os.makedirs(entry, exist_ok=True)
+    pd.to_pickle(result, os.path.join(entry, 'result.pkl'))
+
+
+def evict(max_age=None, max_entries=None):
+    """Remove cache entries not used within max_age seconds, then the oldest beyond max_entries."""
+    max_age = max_age if max_age is not None else config.get('cache_max_age', 7 * 24 * 3600)
+    max_entries = max_entries if max_entries is not None else config.get('cache_max_entries', 50)
+
+    if not os.path.isdir(cache_dir()):
+        return []
+
+    entries = sorted(
+        (os.path.join(cache_dir(), name) for name in os.listdir(cache_dir())),
+        key=os.path.getmtime,
+        reverse=True
+    )
+    now = time.time()
+    evicted = [entry for i, entry in enumerate(entries)
+               if i >= max_entries or now - os.path.getmtime(entry) > max_age]
+
+    for entry in evicted:
+        shutil.rmtree(entry, ignore_errors=True)
+        logger.info("Evicted cache entry: %s", os.path.basename(entry))
+    return evicted
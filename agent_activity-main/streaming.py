@@ -0,0 +1,44 @@
+import logging
+import time
+
+from project_config import config
+from frame_io import read_tickets
+from incremental import score_for_partials, partials, merge_partials, write_reports
+import profiling
+
+logger = logging.getLogger(__name__)
+
+# Streaming mode for exports that do not fit in memory.
+#
+# ticket_data.csv is read 'chunk_size' rows at a time. Each chunk is scored and reduced to
+# per-Assignee/per-day partial aggregates, which are added to a running total; the chunk is
+# then dropped. Only the partials (assignees x days) are ever held for the whole export, so
+# peak memory depends on the chunk size rather than on the size of the export. The aggregate
+# and time reports are built from the partials exactly as in incremental mode.
+
+
+def summarize_export(input_file_path, chunk_size):
+    """Return the per-Assignee/per-day partials of the whole export, reading it in chunks."""
+    start = time.perf_counter()
+    daily = None
+    rows = 0
+    for chunk in read_tickets(input_file_path, chunksize=chunk_size):
+        with profiling.step('score'):
+            scored = score_for_partials(chunk)
+        with profiling.step('group'):
+            chunk_daily = partials(scored)
+            daily = chunk_daily if daily is None else merge_partials([daily, chunk_daily])
+        rows += len(chunk)
+    profiling.record_rows(rows)
+
+    logger.info("Streamed %d tickets in chunks of %d in %.2fs", rows, chunk_size, time.perf_counter() - start)
+    return daily
+
+
+def run_streaming(input_file_path=None, chunk_size=None):
+    """Write the aggregate and time reports for a large export. Returns created files."""
+    input_file_path = input_file_path or config.get('input_file', 'ticket_data.csv')
+    chunk_size = chunk_size or config.get('chunk_size', 100_000)
+
+    with profiling.stage('streaming'):
+        return write_reports(summarize_export(input_file_path, chunk_size))
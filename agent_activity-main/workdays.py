@@ -0,0 +1,21 @@
+from project_config import config
+
+# The "valid workday" rule shared by aggregate_data.py, individual_categories.py and the
+# incremental/streaming reports: a day counts as worked for an assignee when they solved more
+# than 'valid_day_ticket_threshold' tickets on it. Computed with one two-key groupby and a
+# transform, so there is no Python callback per assignee or per assignee-day.
+
+
+def valid_day_threshold():
+    return config.get('valid_day_ticket_threshold', 5)
+
+
+def valid_workday_mask(df, assignee_column='Assignee name', date_column='Ticket solved - Date',
+                       tickets_column='Tickets solved', threshold=None):
+    """True for the rows that fall on a valid workday of their assignee."""
+    threshold = valid_day_threshold() if threshold is None else threshold
+
+    # Tickets solved per assignee and day, broadcast back to every row of that day.
+    # Rows without an assignee or a date belong to no day (NaN) and are never valid.
+    daily_tickets = df.groupby([assignee_column, date_column], observed=True)[tickets_column].transform('sum')
+    return (daily_tickets > threshold) & df[date_column].notna()